@@ -0,0 +1,6 @@
+#
+#  benchmarks
+#
+#  Benchmarks of reading, writing, indexing and searching synthetic catalogs, run them
+#  with `python -m benchmarks --help`.
+#
@@ -0,0 +1,10 @@
+#
+#  __main__.py
+#
+
+import sys
+
+from .runner import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+#
+#  metadata.py
+#
+#  Benchmark reading and writing metadata of a wide table, comparing our generated
+#  codecs with plain dataclasses_json. The generated codecs alone are also part of
+#  `python -m benchmarks`.
+#
+#  Usage: python -m benchmarks.metadata [--variables 10000] [--repeat 3]
+#
+
+import argparse
+import time
+from typing import Any, Callable, Dict, List
+
+from owid.catalog.meta import VariableMeta
+
+from .synthetic import CatalogSpec, make_table
+
+
+def slow_to_dict(meta: VariableMeta) -> Dict[str, Any]:
+    "What `to_dict` did before generating code, dataclasses_json plus pruning."
+    return {k: v for k, v in meta._dataclasses_json_to_dict().items() if v not in [None, [], {}]}  # type: ignore
+
+
+def timed(f: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: Any = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--variables", type=int, default=10_000, help="number of variables of the table")
+    parser.add_argument("--repeat", type=int, default=3, help="keep the best of this many runs")
+    args = parser.parse_args(argv)
+
+    t = make_table(CatalogSpec(rows=1, metadata="rich"), columns=args.variables)
+    fields = t._get_fields_as_dict()
+    columns: List[str] = list(t.all_columns)
+
+    scenarios = {
+        "write (dataclasses_json)": lambda: {col: slow_to_dict(t._fields[col]) for col in columns},
+        "write (generated)": lambda: t._get_fields_as_dict(),
+        "read (dataclasses_json)": lambda: {
+            k: VariableMeta._dataclasses_json_from_dict(v) for k, v in fields.items()  # type: ignore
+        },
+        "read (generated)": lambda: t._set_fields_from_dict(fields),
+    }
+
+    print(f"metadata of a table with {args.variables} variables, best of {args.repeat}")
+    for name, f in scenarios.items():
+        seconds = timed(f, args.repeat)
+        print(f"  {name:<26} {seconds * 1000:8.1f} ms  {args.variables / seconds:12,.0f} variables/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#
+#  runner.py
+#
+#  Run benchmark scenarios, each in a fresh process so that its peak memory can be
+#  measured, and compare the results with a baseline.
+#
+
+import argparse
+import dataclasses
+import json
+import logging
+import multiprocessing
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import structlog
+
+from .scenarios import SCENARIOS
+from .synthetic import SIZES, CatalogSpec
+
+# slowdown relative to the baseline that counts as a regression
+DEFAULT_TOLERANCE = 0.2
+
+
+def run_scenario(name: str, spec: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    "Prepare and time a scenario, keeping the best of `repeat` runs."
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    scenario = SCENARIOS[name]
+    with tempfile.TemporaryDirectory() as workdir:
+        run, items = scenario.prepare(CatalogSpec(**spec), Path(workdir))
+        seconds = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            seconds = min(seconds, time.perf_counter() - start)
+
+    return {
+        "seconds": seconds,
+        "items": items,
+        "unit": scenario.unit,
+        "throughput": items / seconds,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def peak_rss_mb() -> Optional[float]:
+    "Peak resident memory of this process, including preparing the scenario."
+    try:
+        import resource
+    except ImportError:
+        # not available on Windows
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def run(names: List[str], spec: CatalogSpec, repeat: int) -> Dict[str, Any]:
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results[name] = executor.submit(run_scenario, name, spec.to_dict(), repeat).result()
+        print(format_result(name, results[name]), flush=True)
+
+    return {
+        "spec": spec.to_dict(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    "Print how results changed against the baseline and return names of regressed scenarios."
+    if baseline["spec"] != report["spec"]:
+        print("warning: baseline was measured on a different synthetic catalog")
+
+    regressions = []
+    print(f"\nchange against baseline (tolerance {tolerance:.0%})")
+    for name, result in report["results"].items():
+        if name not in baseline["results"]:
+            print(f"  {name:<16} not in baseline")
+            continue
+
+        ratio = result["seconds"] / baseline["results"][name]["seconds"]
+        regressed = ratio > 1 + tolerance
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:<16} {ratio - 1:+8.1%} time  {'REGRESSION' if regressed else ''}")
+
+    return regressions
+
+
+def format_result(name: str, result: Dict[str, Any]) -> str:
+    rss = "" if result["peak_rss_mb"] is None else f"  {result['peak_rss_mb']:8.0f} MB peak RSS"
+    return (
+        f"  {name:<16} {result['seconds'] * 1000:10.1f} ms" f"  {result['throughput']:14,.0f} {result['unit']}/s{rss}"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark the catalog on a synthetic catalog.",
+    )
+    parser.add_argument("scenarios", nargs="*", help=f"scenarios to run, all by default: {', '.join(SCENARIOS)}")
+    parser.add_argument("--size", choices=list(SIZES), default="small", help="preset shape of the synthetic catalog")
+    for field in dataclasses.fields(CatalogSpec):
+        if field.type is int:
+            parser.add_argument(f"--{field.name}", type=int, help=f"override {field.name} of the preset")
+    parser.add_argument("--metadata", choices=["none", "basic", "rich"], help="override richness of metadata")
+    parser.add_argument("--repeat", type=int, default=3, help="keep the best of this many runs")
+    parser.add_argument("--baseline", type=Path, help="compare with results saved by --save")
+    parser.add_argument("--save", type=Path, help="save results as JSON")
+    parser.add_argument(
+        "--tolerance", type=float, default=DEFAULT_TOLERANCE, help="relative slowdown that counts as a regression"
+    )
+    args = parser.parse_args(argv)
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    overrides = {
+        f.name: getattr(args, f.name)
+        for f in dataclasses.fields(CatalogSpec)
+        if getattr(args, f.name, None) is not None
+    }
+    spec = dataclasses.replace(SIZES[args.size], **overrides)
+
+    print(f"{spec.n_datasets} datasets, {spec.n_tables} tables of {spec.rows} rows x {spec.columns} columns")
+    report = run(args.scenarios or list(SCENARIOS), spec, args.repeat)
+
+    if args.save:
+        args.save.write_text(json.dumps(report, indent=2))
+
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressions:
+            print(f"\nregressions: {', '.join(regressions)}")
+            return 1
+
+    return 0
@@ -0,0 +1,104 @@
+#
+#  scenarios.py
+#
+#  Timed scenarios for the main entry points of the catalog. Each scenario prepares its
+#  data in a working directory and returns the operation to time, together with how many
+#  items that operation processes.
+#
+
+import dataclasses
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+from owid.catalog import Dataset, LocalCatalog, Table
+
+from .synthetic import CatalogSpec, make_catalog, make_table
+
+# (operation to time, number of items it processes)
+Prepared = Tuple[Callable[[], object], int]
+
+
+@dataclass
+class Scenario:
+    name: str
+    unit: str
+    prepare: Callable[[CatalogSpec, Path], Prepared]
+
+
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str, unit: str) -> Callable[[Callable[[CatalogSpec, Path], Prepared]], Scenario]:
+    def decorator(prepare: Callable[[CatalogSpec, Path], Prepared]) -> Scenario:
+        SCENARIOS[name] = Scenario(name, unit, prepare)
+        return SCENARIOS[name]
+
+    return decorator
+
+
+@scenario("to_feather", unit="rows")
+def to_feather(spec: CatalogSpec, workdir: Path) -> Prepared:
+    t = make_table(spec)
+    return lambda: t.to_feather(str(workdir / "table.feather")), spec.rows
+
+
+@scenario("read_parquet", unit="rows")
+def read_parquet(spec: CatalogSpec, workdir: Path) -> Prepared:
+    path = str(workdir / "table.parquet")
+    make_table(spec).to_parquet(path)
+    return lambda: Table.read_parquet(path), spec.rows
+
+
+@scenario("dataset_add", unit="tables")
+def dataset_add(spec: CatalogSpec, workdir: Path) -> Prepared:
+    ds = Dataset.create_empty(workdir / "dataset")
+    tables = [make_table(spec, f"table_{i}", seed=i) for i in range(spec.tables)]
+
+    def run() -> None:
+        for t in tables:
+            ds.add(t, formats=spec.formats)
+
+    return run, len(tables)
+
+
+@scenario("reindex", unit="datasets")
+def reindex(spec: CatalogSpec, workdir: Path) -> Prepared:
+    make_catalog(workdir, spec)
+    catalog = LocalCatalog(workdir, channels=spec.channel_names)
+    return catalog.reindex, spec.n_datasets
+
+
+@scenario("find", unit="queries")
+def find(spec: CatalogSpec, workdir: Path) -> Prepared:
+    make_catalog(workdir, spec)
+    catalog = LocalCatalog(workdir, channels=spec.channel_names)
+    queries = [
+        {"table": "table_1"},
+        {"table": "dataset_0_table"},
+        {"namespace": "namespace_0"},
+        {"namespace": "namespace_1", "version": "2001-01-01"},
+        {"table": "table_0", "namespace": "namespace_0", "dataset": "dataset_1"},
+        {},
+    ] * 50
+
+    def run() -> None:
+        for query in queries:
+            catalog.find(**query)
+
+    # the search index is built on first use
+    catalog.find()
+    return run, len(queries)
+
+
+@scenario("metadata_write", unit="variables")
+def metadata_write(spec: CatalogSpec, workdir: Path) -> Prepared:
+    t = make_table(dataclasses.replace(spec, rows=1), columns=spec.variables)
+    return t._get_fields_as_dict, spec.variables
+
+
+@scenario("metadata_read", unit="variables")
+def metadata_read(spec: CatalogSpec, workdir: Path) -> Prepared:
+    t = make_table(dataclasses.replace(spec, rows=1), columns=spec.variables)
+    fields = t._get_fields_as_dict()
+    return lambda: t._set_fields_from_dict(fields), spec.variables
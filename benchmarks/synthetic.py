@@ -0,0 +1,156 @@
+#
+#  synthetic.py
+#
+#  Generate synthetic tables and catalogs for benchmarks.
+#
+
+import dataclasses
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Literal
+
+import numpy as np
+
+from owid.catalog import Dataset, Table
+from owid.catalog.datasets import CHANNEL, FileFormat
+from owid.catalog.meta import DatasetMeta, License, Source, VariableMeta
+
+CHANNELS: List[CHANNEL] = ["garden", "meadow", "grapher", "backport", "open_numbers", "examples", "explorers"]
+
+MetadataRichness = Literal["none", "basic", "rich"]
+
+
+@dataclass
+class CatalogSpec:
+    # shape of the catalog, the number of datasets is the product of the first four
+    channels: int = 1
+    namespaces: int = 2
+    versions: int = 2
+    datasets: int = 3
+    tables: int = 2
+
+    # shape of each table, besides its `country` and `year` index
+    rows: int = 1000
+    columns: int = 10
+
+    # number of columns of the wide table used for metadata scenarios
+    variables: int = 1000
+
+    metadata: MetadataRichness = "basic"
+    formats: List[FileFormat] = dataclasses.field(default_factory=lambda: ["feather"])
+    seed: int = 0
+
+    def __post_init__(self) -> None:
+        if not 1 <= self.channels <= len(CHANNELS):
+            raise ValueError(f"channels must be between 1 and {len(CHANNELS)}")
+
+    @property
+    def channel_names(self) -> List[CHANNEL]:
+        return CHANNELS[: self.channels]
+
+    @property
+    def n_datasets(self) -> int:
+        return self.channels * self.namespaces * self.versions * self.datasets
+
+    @property
+    def n_tables(self) -> int:
+        return self.n_datasets * self.tables
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dataclasses.asdict(self)
+
+
+SIZES = {
+    "small": CatalogSpec(),
+    "medium": CatalogSpec(
+        channels=2, namespaces=5, versions=3, datasets=5, tables=3, rows=10_000, columns=20, variables=10_000
+    ),
+    "large": CatalogSpec(
+        channels=3,
+        namespaces=10,
+        versions=5,
+        datasets=10,
+        tables=5,
+        rows=100_000,
+        columns=50,
+        variables=50_000,
+        metadata="rich",
+    ),
+}
+
+
+def make_variable_meta(i: int, richness: MetadataRichness) -> VariableMeta:
+    if richness == "none":
+        return VariableMeta()
+
+    meta = VariableMeta(title=f"Variable {i}", unit="people", short_unit="")
+    if richness == "rich":
+        meta.description = f"Description of variable {i}, which is usually a paragraph or two long. " * 3
+        meta.sources = [
+            Source(
+                name=f"Source {j}",
+                description="Description of the source",
+                url="https://example.com",
+                date_accessed="2022-01-01",
+                publication_year=2021,
+            )
+            for j in range(2)
+        ]
+        meta.licenses = [License(name="CC BY 4.0", url="https://creativecommons.org/licenses/by/4.0/")]
+        meta.display = {"numDecimalPlaces": 1, "conversionFactor": 100, "includeInTable": True}
+        meta.additional_info = {"processing": ["step 1", "step 2"]}
+    return meta
+
+
+def make_table(spec: CatalogSpec, short_name: str = "table", seed: int = 0, columns: int = -1) -> Table:
+    "Table with `country` and `year` index and a mix of float, int and string columns."
+    rng = np.random.default_rng(spec.seed + seed)
+    columns = spec.columns if columns < 0 else columns
+
+    data: Dict[str, Any] = {
+        "country": rng.choice([f"country_{i}" for i in range(200)], spec.rows),
+        "year": rng.integers(1800, 2023, spec.rows),
+    }
+    for i in range(columns):
+        if i % 5 == 4:
+            data[f"variable_{i}"] = rng.choice(["low", "medium", "high"], spec.rows)
+        elif i % 5 == 3:
+            data[f"variable_{i}"] = rng.integers(0, 1_000_000, spec.rows)
+        else:
+            data[f"variable_{i}"] = rng.normal(size=spec.rows)
+
+    t = Table(data, short_name=short_name).set_index(["country", "year"])
+    t.metadata.title = f"Table {short_name}"
+    for i, col in enumerate(t.columns):
+        t._fields[col] = make_variable_meta(i, spec.metadata)
+    return t
+
+
+def make_catalog(path: Path, spec: CatalogSpec) -> List[Dataset]:
+    "Write a catalog laid out as channel/namespace/version/dataset/table under `path`."
+    datasets = []
+    seed = 0
+    for channel in spec.channel_names:
+        for n in range(spec.namespaces):
+            for v in range(spec.versions):
+                for d in range(spec.datasets):
+                    namespace = f"namespace_{n}"
+                    version = f"{2000 + v}-01-01"
+                    short_name = f"dataset_{d}"
+                    (path / channel / namespace / version).mkdir(parents=True, exist_ok=True)
+                    ds = Dataset.create_empty(
+                        path / channel / namespace / version / short_name,
+                        DatasetMeta(
+                            channel=channel,
+                            namespace=namespace,
+                            short_name=short_name,
+                            version=version,
+                            title=f"Dataset {short_name}",
+                        ),
+                    )
+                    ds.save()
+                    for i in range(spec.tables):
+                        seed += 1
+                        ds.add(make_table(spec, f"{short_name}_table_{i}", seed=seed), formats=spec.formats)
+                    datasets.append(ds)
+    return datasets
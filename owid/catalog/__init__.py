@@ -1,7 +1,15 @@
 __version__ = "0.1.0"
 
 from . import utils
-from .catalogs import CHANNEL, LocalCatalog, RemoteCatalog, find, find_latest, find_one
+from .catalogs import (
+    CHANNEL,
+    LocalCatalog,
+    RemoteCatalog,
+    afind,
+    find,
+    find_latest,
+    find_one,
+)
 from .datasets import Dataset
 from .meta import DatasetMeta, License, Source, TableMeta, VariableMeta
 from .tables import Table
@@ -11,6 +19,7 @@ __all__ = [
     "LocalCatalog",
     "RemoteCatalog",
     "find",
+    "afind",
     "find_latest",
     "find_one",
     "Dataset",
@@ -0,0 +1,261 @@
+#
+#  cache.py
+#
+#  Local on-disk caches for files fetched from remote catalogs.
+#
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from os.path import splitext
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union, cast
+from urllib.parse import urlparse
+
+import requests
+import structlog
+
+from . import sessions
+from .instrumentation import span
+
+log = structlog.get_logger()
+
+# where to cache catalog files by default, caching is disabled if unset
+CACHE_DIR = os.environ.get("OWID_CATALOG_CACHE_DIR")
+
+# how large we let the cache grow before evicting the least recently used files
+DEFAULT_CACHE_SIZE = 2**30  # 1GB
+
+# errors of a download that broke off halfway
+BROKEN_DOWNLOAD = (requests.ConnectionError, requests.exceptions.ChunkedEncodingError)
+
+
+class HTTPCache:
+    """
+    A directory of files downloaded over HTTP. Each file is stored together with its
+    ETag and Last-Modified headers, so that later fetches can be revalidated with a
+    conditional request and served from disk when the server answers 304.
+    """
+
+    def __init__(self, path: Union[str, Path], max_bytes: int = DEFAULT_CACHE_SIZE) -> None:
+        self.path = Path(path).expanduser()
+        self.max_bytes = max_bytes
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def get(self, url: str) -> Path:
+        """
+        Return a local copy of the file at `url`, downloading it only if it's missing
+        from the cache or has changed on the server.
+        """
+        with span("cache.get", path=url) as s:
+            data_file = self._data_file(url)
+            headers_file = self._headers_file(url)
+
+            cached_headers = self._read_headers(headers_file) if data_file.exists() else None
+
+            request_headers = {}
+            if cached_headers:
+                if cached_headers.get("ETag"):
+                    request_headers["If-None-Match"] = cached_headers["ETag"]
+                if cached_headers.get("Last-Modified"):
+                    request_headers["If-Modified-Since"] = cached_headers["Last-Modified"]
+
+            try:
+                resp = sessions.get(url, headers=request_headers, stream=True)
+            except requests.ConnectionError:
+                if cached_headers is None:
+                    raise
+                return self._stale(url, data_file, s)
+
+            # release the connection back to the pool however we leave
+            with resp:
+                if resp.status_code == 304 and cached_headers is not None:
+                    # reading the (empty) body lets the connection be reused rather than closed
+                    resp.content
+                    log.debug("cache.hit", url=url)
+                    self._touch(data_file)
+                    if s:
+                        s.cache_hit = True
+                    return data_file
+
+                resp.raise_for_status()
+                log.debug("cache.miss", url=url)
+                if s:
+                    s.cache_hit = False
+
+                # write to a temporary file first, so that concurrent readers never see partial files
+                ostream = tempfile.NamedTemporaryFile(dir=self.path, delete=False)
+                try:
+                    with ostream:
+                        for chunk in resp.iter_content(chunk_size=2**20):
+                            ostream.write(chunk)
+                    os.replace(ostream.name, data_file)
+                except BaseException as e:
+                    # failed downloads would otherwise pile up, since eviction skips them
+                    _remove(Path(ostream.name))
+                    if isinstance(e, BROKEN_DOWNLOAD) and cached_headers is not None:
+                        return self._stale(url, data_file, s)
+                    raise
+
+            with open(headers_file, "w") as ostream:
+                json.dump(
+                    {"url": url, **{k: resp.headers[k] for k in ("ETag", "Last-Modified") if k in resp.headers}},
+                    ostream,
+                )
+
+            self.evict(keep=[data_file])
+            if s:
+                s.bytes = data_file.stat().st_size
+
+            return data_file
+
+    def _stale(self, url: str, data_file: Path, s: Any) -> Path:
+        # better stale data than no data at all
+        log.warning("cache.stale", url=url)
+        self._touch(data_file)
+        if s:
+            s.cache_hit = True
+        return data_file
+
+    def evict(self, keep: Iterable[Path] = ()) -> None:
+        "Delete least recently used files until the cache fits in `max_bytes`."
+        evict_lru(self.path, self.max_bytes, keep=keep)
+
+    def _data_file(self, url: str) -> Path:
+        # keep the extension so that we can still detect the file format
+        _, ext = splitext(urlparse(url).path)
+        return self.path / (_url_key(url) + ext)
+
+    def _headers_file(self, url: str) -> Path:
+        return self.path / (_url_key(url) + ".headers.json")
+
+    @staticmethod
+    def _read_headers(filename: Path) -> Optional[Dict[str, str]]:
+        try:
+            with open(filename) as istream:
+                return cast(Dict[str, str], json.load(istream))
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _touch(filename: Path) -> None:
+        # we use modification times to find the least recently used files
+        os.utime(filename)
+
+
+class TableCache:
+    """
+    A content-addressed directory of tables loaded from a catalog, keyed by the table's
+    path, the checksum of its dataset and its format. An unchanged table is therefore
+    only downloaded once, while a new version of its dataset gets a fresh entry.
+
+    The number of cache hits and misses is kept in `hits` and `misses`.
+    """
+
+    def __init__(self, path: Union[str, Path], max_bytes: int = DEFAULT_CACHE_SIZE) -> None:
+        self.path = Path(path).expanduser()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        # tables may be loaded from several threads at once
+        self._lock = threading.Lock()
+
+    def fetch(self, path: str, checksum: str, format: str, download: Callable[[str], str]) -> Path:
+        """
+        Return the local data file of a table, calling `download(dirname)` to fetch it on
+        a cache miss. The download function should save the data file and its `.meta.json`
+        sidecar into the given directory and return the data file's path.
+        """
+        entry = self.path / _url_key(f"{path}:{checksum}:{format}")
+        data_file = entry / f"data.{format}"
+
+        with span("cache.fetch", path=path, format=format) as s:
+            if data_file.exists():
+                with self._lock:
+                    self.hits += 1
+                log.debug("cache.hit", path=path, format=format)
+                os.utime(entry)
+                if s:
+                    s.cache_hit = True
+                return data_file
+
+            with self._lock:
+                self.misses += 1
+            log.debug("cache.miss", path=path, format=format)
+            if s:
+                s.cache_hit = False
+
+            # download into a temporary directory, so that concurrent readers never see partial entries
+            tmpdir = tempfile.mkdtemp(dir=self.path)
+            try:
+                filename = Path(download(tmpdir))
+                filename.rename(Path(tmpdir) / data_file.name)
+            except BaseException:
+                # failed downloads would otherwise pile up, since eviction skips them
+                _remove(Path(tmpdir))
+                raise
+
+            try:
+                os.rename(tmpdir, entry)
+            except OSError:
+                # someone else cached the same table in the meantime
+                _remove(Path(tmpdir))
+
+            evict_lru(self.path, self.max_bytes, keep=[entry])
+
+            return data_file
+
+
+def evict_lru(path: Path, max_bytes: int, keep: Iterable[Path] = ()) -> None:
+    """
+    Delete the least recently modified entries of a cache directory until its total
+    size fits in `max_bytes`. Entries are files or directories; files sharing a stem
+    with an entry (e.g. `<key>.headers.json`) are removed along with it.
+    """
+    keep = set(keep)
+    entries: List[Any] = []
+    total = 0
+    for entry in path.iterdir():
+        if entry.name.endswith(".headers.json") or entry.name.startswith("tmp"):
+            continue
+        try:
+            size = _size(entry)
+            entries.append((entry.stat().st_mtime_ns, size, entry))
+        except FileNotFoundError:
+            # evicted concurrently by another process
+            continue
+        total += size
+
+    for _, size, entry in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        if entry in keep:
+            continue
+
+        log.debug("cache.evict", path=entry.as_posix(), bytes=size)
+        _remove(entry)
+        _remove(path / (entry.name.split(".")[0] + ".headers.json"))
+        total -= size
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+def _size(path: Path) -> int:
+    if path.is_dir():
+        return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+    return path.stat().st_size
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir():
+        for f in path.iterdir():
+            f.unlink()
+        path.rmdir()
+    elif path.exists():
+        path.unlink()
@@ -3,24 +3,54 @@
 #  owid-catalog-py
 #
 
+import asyncio
 import heapq
+import io
 import json
 import os
 import re
+import shutil
 import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import repeat
 from pathlib import Path
-from typing import Any, Dict, Iterable, Iterator, List, Optional, Union, cast
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
 from urllib.parse import urlparse
 
 import numpy as np
 import numpy.typing as npt
 import pandas as pd
-import requests
+import pyarrow
 import structlog
 
-from . import s3_utils
-from .datasets import CHANNEL, PREFERRED_FORMAT, SUPPORTED_FORMATS, Dataset, FileFormat
-from .tables import Table
+from . import s3_utils, sessions
+from .cache import CACHE_DIR, DEFAULT_CACHE_SIZE, HTTPCache, TableCache
+from .datasets import (
+    CHANNEL,
+    DEFAULT_HASH_ALGORITHM,
+    PREFERRED_FORMAT,
+    SUPPORTED_FORMATS,
+    Dataset,
+    FileFormat,
+    FileStats,
+    checksum_file,
+)
+from .search import HASH_COLUMNS, SearchIndex
+from .tables import ArrowTable, Filters, LazyTable, Table
 
 log = structlog.get_logger()
 
@@ -35,10 +65,17 @@ S3_OWID_URI = "s3://owid-catalog"
 
 # global copy cached after first request
 REMOTE_CATALOG: Optional["RemoteCatalog"] = None
+_REMOTE_CATALOG_LOCK = threading.Lock()
 
 # what formats should we for our index of available datasets?
 INDEX_FORMATS: List[FileFormat] = ["feather", "parquet"]
 
+# how many tables to download at once when loading many of them
+LOAD_WORKERS = 8
+
+# size, modification time and MD5 checksum of each file of a dataset, keyed by file name
+DatasetManifest = FileStats
+
 
 class CatalogMixin:
     """
@@ -49,6 +86,12 @@ class CatalogMixin:
     frame: "CatalogFrame"
     uri: str
 
+    # the frame we last indexed, together with its index
+    _search_index: Optional[Tuple["CatalogFrame", SearchIndex]] = None
+
+    # the frame read from our channel files, while their saved search indexes may still apply to it
+    _channels_frame: Optional["CatalogFrame"] = None
+
     def find(
         self,
         table: Optional[str] = None,
@@ -57,35 +100,56 @@ class CatalogMixin:
         dataset: Optional[str] = None,
         channel: Optional[CHANNEL] = None,
     ) -> "CatalogFrame":
-        criteria: npt.ArrayLike = np.ones(len(self.frame), dtype=bool)
+        if channel and channel not in self.channels:
+            raise ValueError(
+                f"You need to add `{channel}` to channels in Catalog init (only `{self.channels}` are loaded now)"
+            )
 
-        if table:
-            criteria &= self.frame.table.str.contains(table)
+        values = [namespace, version, dataset, channel]
+        index = self.search_index
+        if index is None:
+            positions = _scan(self.frame, table, values)
+        else:
+            positions = _search(self.frame, index, table, values)
 
-        if namespace:
-            criteria &= self.frame.namespace == namespace
+        matches = self.frame.iloc[positions]
+        if "checksum" in matches.columns and not self.frame._table_cache:
+            # checksums are only needed for caching loaded tables
+            matches = matches.drop(columns=["checksum"])
 
-        if version:
-            criteria &= self.frame.version == version
+        return cast(CatalogFrame, matches)
 
-        if dataset:
-            criteria &= self.frame.dataset == dataset
+    @property
+    def search_index(self) -> Optional[SearchIndex]:
+        """
+        Inverted index over the current frame, or None if there's none for it (yet), in
+        which case `find()` scans the frame. Building one takes longer than a scan, so we
+        only use the indexes saved by `reindex()` next to the channel files.
+        """
+        if self._search_index is None or self._search_index[0] is not self.frame:
+            if self.frame is not self._channels_frame:
+                return None
 
-        if channel:
-            if channel not in self.channels:
-                raise ValueError(
-                    f"You need to add `{channel}` to channels in Catalog init (only `{self.channels}` are loaded now)"
-                )
-            criteria &= self.frame.channel == channel
+            index = self._load_search_index()
+            if index is None:
+                return None
 
-        matches = self.frame[criteria]
-        if "checksum" in matches.columns:
-            matches = matches.drop(columns=["checksum"])
+            self._search_index = (self.frame, index)
 
-        return cast(CatalogFrame, matches)
+        return self._search_index[1]
 
-    def find_one(self, *args: Optional[str], **kwargs: Optional[str]) -> Table:
-        return self.find(*args, **kwargs).load()  # type: ignore
+    def _load_search_index(self) -> Optional[SearchIndex]:
+        "Return the saved search index of our channels, if it's available and up to date."
+        return None
+
+    def find_one(
+        self,
+        *args: Optional[str],
+        columns: Optional[List[str]] = None,
+        filters: Optional[Filters] = None,
+        **kwargs: Optional[str],
+    ) -> Table:
+        return self.find(*args, **kwargs).load(columns=columns, filters=filters)  # type: ignore
 
     def find_latest(
         self,
@@ -118,15 +182,19 @@ class LocalCatalog(CatalogMixin):
 
     uri: str
 
-    def __init__(self, path: Union[str, Path], channels: Iterable[CHANNEL] = ("garden",)) -> None:
+    def __init__(self, path: Union[str, Path], channels: Iterable[CHANNEL] = ("garden",), workers: int = 1) -> None:
+        """
+        :param workers: number of processes used to index datasets if the catalog has no index yet
+        """
         self.uri = str(path)
         self.channels = channels
         if self._catalog_exists(channels):
             self.frame = CatalogFrame(self._read_channels(channels))
             self.frame._base_uri = self.path.as_posix() + "/"
+            self._channels_frame = self.frame
         else:
             # could take a while to generate if there are many datasets
-            self.reindex()
+            self.reindex(workers=workers)
 
         # ensure the frame knows where to load data from
 
@@ -140,10 +208,17 @@ class LocalCatalog(CatalogMixin):
     def _catalog_channel_file(self, channel: CHANNEL, format: FileFormat = PREFERRED_FORMAT) -> Path:
         return self.path / f"catalog-{channel}.{format}"
 
+    def _catalog_index_file(self, channel: CHANNEL) -> Path:
+        return self.path / f"catalog-{channel}.index.feather"
+
     @property
     def _metadata_file(self) -> Path:
         return self.path / "catalog.meta.json"
 
+    @property
+    def _manifest_file(self) -> Path:
+        return self.path / "catalog.manifest.json"
+
     def _read_channels(self, channels: Iterable[CHANNEL]) -> pd.DataFrame:
         """
         Read selected channels from local path.
@@ -152,33 +227,122 @@ class LocalCatalog(CatalogMixin):
         df.dimensions = df.dimensions.map(lambda s: json.loads(s) if isinstance(s, str) else s)
         return df
 
-    def iter_datasets(self, channel: CHANNEL, include: Optional[str] = None) -> Iterator[Dataset]:
-        to_search = [self.path / channel]
-        if not to_search[0].exists():
+    def _load_search_index(self) -> Optional[SearchIndex]:
+        """
+        Read the search indexes saved by `reindex()` for our channels, if all of them exist
+        and were built from the channel files as they are now.
+        """
+        # only look once, if they're missing or stale now they'll stay so
+        self._channels_frame = None
+
+        indexes = []
+        for channel in self.channels:
+            filename = self._catalog_index_file(channel)
+            if not filename.exists():
+                return None
+
+            # channel files might have been rewritten since they were indexed
+            index = SearchIndex.load(filename)
+            if index.source is None or index.source != _file_checksum(self._catalog_channel_file(channel)):
+                log.info("search_index.stale", channel=channel)
+                return None
+
+            indexes.append(index)
+
+        index = SearchIndex.concat(indexes)
+        if index.n_rows != len(self.frame):
+            return None
+
+        self._channels_frame = self.frame
+        return index
+
+    def iter_datasets(self, channel: CHANNEL, include: Optional[str] = None, workers: int = 1) -> Iterator[Dataset]:
+        """
+        Yield datasets of a channel whose path matches `include`, in order of their paths.
+        The pattern is searched anywhere in a dataset's path, so any directory might still
+        contain matches and the whole tree is listed; only datasets aren't looked inside.
+
+        :param workers: number of threads to list directories with, which helps on network
+            filesystems; the output is the same no matter how many are used
+        """
+        root = self.path / channel
+        if not root.exists():
             return
 
         re_search = re.compile(include or "")
 
+        def matches(parts: Tuple[str, ...]) -> bool:
+            return bool(re_search.search(str(root.joinpath(*parts))))
+
+        if workers > 1:
+            yield from self._iter_datasets_parallel(root, matches, workers)
+            return
+
+        # we sort by path parts, the same order as comparing `Path` objects
+        to_search: List[Tuple[str, ...]] = [()]
         while to_search:
-            dir = heapq.heappop(to_search)
-            if (dir / "index.json").exists() and re_search.search(str(dir)):
-                yield Dataset(dir)
+            parts = heapq.heappop(to_search)
+            is_dataset, children = _scan_dir(root.joinpath(*parts))
+            if is_dataset:
+                if matches(parts):
+                    yield Dataset(root.joinpath(*parts))
+                # datasets don't contain other datasets, so there's no need to look inside
                 continue
 
-            for child in dir.iterdir():
-                if child.is_dir():
-                    heapq.heappush(to_search, child)
-
-    def reindex(self, include: Optional[str] = None) -> None:
+            for child in children:
+                heapq.heappush(to_search, parts + (child,))
+
+    def _iter_datasets_parallel(
+        self, root: Path, matches: Callable[[Tuple[str, ...]], bool], workers: int
+    ) -> Iterator[Dataset]:
+        "Walk the tree one level at a time, listing all directories of a level concurrently."
+        found = []
+        level: List[Tuple[str, ...]] = [()]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while level:
+                next_level = []
+                for parts, (is_dataset, children) in zip(
+                    level, executor.map(lambda parts: _scan_dir(root.joinpath(*parts)), level)
+                ):
+                    if is_dataset:
+                        if matches(parts):
+                            found.append(parts)
+                    else:
+                        next_level += [parts + (child,) for child in children]
+                level = next_level
+
+        for parts in sorted(found):
+            yield Dataset(root.joinpath(*parts))
+
+    def reindex(self, include: Optional[str] = None, workers: int = 1, incremental: bool = False) -> None:
         """
         Walk the directory tree, generate a channel/namespace/version/dataset/table frame
         and save it to each of our index formats.
+
+        :param workers: number of processes to index datasets with, the result is the same
+            no matter how many are used
+        :param incremental: only index datasets whose files were added, changed or deleted
+            since the last reindex, according to the manifest of file sizes and modification
+            times saved next to the index
         """
-        index = self._scan_for_datasets(include)
+        previous = self._read_manifest()
+        manifest = previous if incremental and self._catalog_exists(self.channels) else None
+
+        index, found = self._scan_for_datasets(include, workers=workers, manifest=manifest)
 
-        if include:
-            # we used regex to find datasets, so merge it with the original frame
-            index = self._merge_index(self.frame, index)
+        if manifest is not None:
+            # drop datasets that changed or disappeared, keep the rest
+            dataset_dirs = self.frame.path.str.rsplit("/", n=1).str[0]
+            unchanged = {k for k, v in found.items() if manifest.get(k) == v}
+            keep = dataset_dirs.isin(unchanged) | ~dataset_dirs.map(self._in_scope(include))
+            frame = CatalogFrame(self.frame.loc[keep.to_numpy()])
+            index = self._merge_index(frame, index) if len(index) else frame
+
+        elif include:
+            # we used regex to find datasets, so they replace what the original frame had of them
+            dataset_dirs = self.frame.path.str.rsplit("/", n=1).str[0]
+            frame = CatalogFrame(self.frame.loc[~dataset_dirs.map(self._in_scope(include)).to_numpy()])
+            index = self._merge_index(frame, index)
 
         index._base_uri = self.path.as_posix() + "/"
 
@@ -188,8 +352,22 @@ class LocalCatalog(CatalogMixin):
         # make sure dimensions json is loaded
         index.dimensions = index.dimensions.map(lambda s: json.loads(s) if isinstance(s, str) else s)
 
-        self._save_index(index)
-        self.frame = index
+        # merged indexes end up in the same order as ones built from scratch
+        self._save_index(self._sort_index(index))
+
+        # remember the state of files of all datasets we've seen
+        in_scope = self._in_scope(include)
+        self._save_manifest({**{k: v for k, v in previous.items() if not in_scope(k)}, **found})
+
+    def _in_scope(self, include: Optional[str] = None) -> Callable[[str], bool]:
+        "Return whether a reindex of our channels with `include` would look at a dataset, given its relative path."
+        channels = set(self.channels)
+        re_search = re.compile(include or "")
+
+        def in_scope(dataset_dir: str) -> bool:
+            return dataset_dir.split("/")[0] in channels and bool(re_search.search(str(self.path / dataset_dir)))
+
+        return in_scope
 
     @staticmethod
     def _merge_index(frame: "CatalogFrame", update: "CatalogFrame") -> "CatalogFrame":
@@ -201,45 +379,114 @@ class LocalCatalog(CatalogMixin):
             )
         )
 
+    @staticmethod
+    def _sort_index(frame: "CatalogFrame") -> "CatalogFrame":
+        """Sort an index by table, dataset, version, namespace and channel, with these columns first."""
+        keys = ["table", "dataset", "version", "namespace", "channel", "is_public"]
+        columns = keys + [c for c in frame.columns if c not in keys]
+
+        sorted_frame = CatalogFrame(frame.sort_values(keys).loc[:, columns])
+        sorted_frame._base_uri = frame._base_uri
+        return sorted_frame
+
     def _save_index(self, frame: "CatalogFrame") -> None:
         """
         Save all channels to disk in separate catalog files, and in each of our
-        supported formats.
+        supported formats, together with their search indexes. The frame read back
+        from those files becomes our frame.
         """
+        channel_frames = []
+        indexes = []
         for channel in self.channels:
             channel_frame = frame.loc[frame.channel == channel].reset_index(drop=True)
             for format in INDEX_FORMATS:
                 filename = self._catalog_channel_file(channel, format)
                 save_frame(channel_frame, filename)
 
+            # the index only holds for the exact file it was built from
+            index = SearchIndex.from_frame(channel_frame, source=_file_checksum(self._catalog_channel_file(channel)))
+            index.save(self._catalog_index_file(channel))
+
+            channel_frames.append(channel_frame)
+            indexes.append(index)
+
         # add a catalog version number that we can use to tell old clients to update
         self._save_metadata({"format_version": OWID_CATALOG_VERSION})
 
-    def _scan_for_datasets(self, include: Optional[str] = None) -> "CatalogFrame":
-        """Scan datasets. You can filter by `include` to get better performance."""
+        self.frame = CatalogFrame(pd.concat(channel_frames))
+        self.frame._base_uri = frame._base_uri
+        self._channels_frame = self.frame
+        self._search_index = (self.frame, SearchIndex.concat(indexes))
+
+    def _scan_for_datasets(
+        self,
+        include: Optional[str] = None,
+        workers: int = 1,
+        manifest: Optional[Dict[str, DatasetManifest]] = None,
+    ) -> Tuple["CatalogFrame", Dict[str, DatasetManifest]]:
+        """
+        Scan datasets. You can filter by `include` to get better performance. If you pass the
+        `manifest` of a previous scan, datasets whose files haven't changed since are skipped.
+
+        Return the index of scanned datasets and the manifest of all datasets found.
+        """
         frames = []
-        log.info("reindex.start", channels=self.channels, include=include)
-        for channel in self.channels:
-            channel_frames = []
-            for ds in self.iter_datasets(channel, include=include):
-                channel_frames.append(ds.index(self.path))
-            frames += channel_frames
-            log.info(
-                "reindex",
-                channel=channel,
-                datasets=len(channel_frames),
-                include=include,
-            )
+        found: Dict[str, DatasetManifest] = {}
+        log.info("reindex.start", channels=self.channels, include=include, workers=workers)
+
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            for channel in self.channels:
+                paths = []
+                previous: List[Optional[DatasetManifest]] = []
+                for ds in self.iter_datasets(channel, include=include, workers=workers):
+                    key = Path(ds.path).relative_to(self.path).as_posix()
+                    if manifest and key in manifest and _is_unchanged(ds, manifest[key]):
+                        found[key] = manifest[key]
+                    else:
+                        paths.append(ds.path)
+                        # files that haven't changed in the dataset don't need hashing again
+                        previous.append((manifest or {}).get(key))
+
+                if executor:
+                    # results come back in the order of `paths`, keeping the output deterministic
+                    chunksize = max(1, len(paths) // (4 * workers))
+                    results = list(
+                        executor.map(_index_dataset, paths, repeat(self.path), previous, chunksize=chunksize)
+                    )
+                else:
+                    results = [_index_dataset(path, self.path, p) for path, p in zip(paths, previous)]
+
+                for path, (frame, dataset_manifest) in zip(paths, results):
+                    frames.append(frame)
+                    found[Path(path).relative_to(self.path).as_posix()] = dataset_manifest
+
+                log.info(
+                    "reindex",
+                    channel=channel,
+                    datasets=len(results),
+                    include=include,
+                )
+        finally:
+            if executor:
+                executor.shutdown()
 
-        df = pd.concat(frames, ignore_index=True)
+        if not frames and manifest is not None:
+            # nothing changed
+            return CatalogFrame(), found
 
-        keys = ["table", "dataset", "version", "namespace", "channel", "is_public"]
-        columns = keys + [c for c in df.columns if c not in keys]
+        return CatalogFrame(pd.concat(frames, ignore_index=True)), found
+
+    def _read_manifest(self) -> Dict[str, DatasetManifest]:
+        if not self._manifest_file.exists():
+            return {}
 
-        df.sort_values(keys, inplace=True)  # type: ignore
-        df = df.loc[:, columns]
+        with open(self._manifest_file) as istream:
+            return cast(Dict[str, DatasetManifest], json.load(istream))
 
-        return CatalogFrame(df)
+    def _save_manifest(self, manifest: Dict[str, DatasetManifest]) -> None:
+        with open(self._manifest_file, "w") as ostream:
+            json.dump(manifest, ostream, indent=2, sort_keys=True)
 
     def _save_metadata(self, contents: Dict[str, Any]) -> None:
         with open(self._metadata_file, "w") as ostream:
@@ -247,12 +494,32 @@ class LocalCatalog(CatalogMixin):
 
 
 class RemoteCatalog(CatalogMixin):
+    """
+    A data catalog served over HTTP. Pass `cache_dir` (or set `OWID_CATALOG_CACHE_DIR`) to
+    keep the catalog index on disk between runs; it is then only downloaded again when
+    it changes on the server, and its search index is fetched in the background on the
+    first search. Pass a `TableCache` as `table_cache` to also keep loaded tables on disk
+    until their dataset changes.
+    """
+
     uri: str
+    cache: Optional[HTTPCache]
+
+    # cached channel files the frame was read from, with their size, modification time and inode
+    _channel_files: List[Tuple[Path, Tuple[int, int, int]]]
 
-    def __init__(self, uri: str = OWID_CATALOG_URI, channels: Iterable[CHANNEL] = ("garden",)) -> None:
+    def __init__(
+        self,
+        uri: str = OWID_CATALOG_URI,
+        channels: Iterable[CHANNEL] = ("garden",),
+        cache_dir: Optional[Union[str, Path]] = CACHE_DIR,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        table_cache: Optional[TableCache] = None,
+    ) -> None:
         self.uri = uri
         self.channels = channels
-        self.metadata = self._read_metadata(self.uri + "catalog.meta.json")
+        self.cache = HTTPCache(cache_dir, max_bytes=cache_size) if cache_dir else None
+        self.metadata = self._read_metadata(self.uri + "catalog.meta.json", cache=self.cache)
         if self.metadata["format_version"] > OWID_CATALOG_VERSION:
             raise PackageUpdateRequired(
                 f"library supports api version {OWID_CATALOG_VERSION}, "
@@ -260,28 +527,99 @@ class RemoteCatalog(CatalogMixin):
                 "-- please update"
             )
 
-        self.frame = CatalogFrame(self._read_channels(uri, channels))
+        self._channel_files = []
+        self._index_lock = threading.Lock()
+        self._index_fetch: Optional["Future[Optional[SearchIndex]]"] = None
+
+        self.frame = CatalogFrame(self._read_channels(channels))
         self.frame._base_uri = uri
+        self.frame._table_cache = table_cache
+        self._channels_frame = self.frame
+
+    @classmethod
+    async def acreate(cls, *args: Any, **kwargs: Any) -> "RemoteCatalog":
+        """
+        Async constructor, downloads the catalog index without blocking the event loop.
+        Takes the same arguments as `RemoteCatalog()`.
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, partial(cls, *args, **kwargs))
 
     @property
     def datasets(self) -> pd.DataFrame:
         return self.frame[["namespace", "version", "dataset"]].drop_duplicates()
 
     @staticmethod
-    def _read_metadata(uri: str) -> Dict[str, Any]:
+    def _read_metadata(uri: str, cache: Optional[HTTPCache] = None) -> Dict[str, Any]:
         """
         Read the metadata JSON blob for this repo.
         """
-        resp = requests.get(uri)
+        if cache:
+            with open(cache.get(uri)) as istream:
+                return cast(Dict[str, Any], json.load(istream))
+
+        resp = sessions.get(uri)
         resp.raise_for_status()
         return cast(Dict[str, Any], resp.json())
 
-    @staticmethod
-    def _read_channels(uri: str, channels: Iterable[CHANNEL]) -> pd.DataFrame:
+    def _read_channels(self, channels: Iterable[CHANNEL]) -> pd.DataFrame:
         """
         Read selected channels from S3.
         """
-        return pd.concat([read_frame(uri + f"catalog-{channel}.{PREFERRED_FORMAT}") for channel in channels])
+        uris = [self.uri + f"catalog-{channel}.{PREFERRED_FORMAT}" for channel in channels]
+        if self.cache:
+            filenames = [self.cache.get(u) for u in uris]
+            self._channel_files = [(f, _file_version(f)) for f in filenames]
+            return pd.concat([read_frame(f) for f in filenames])
+
+        return pd.concat([read_frame(u) for u in uris])
+
+    def _load_search_index(self) -> Optional[SearchIndex]:
+        """
+        Fetch the search indexes published next to our channel files in a background
+        thread, so that searches scan the frame instead of waiting for them. Without an
+        `HTTPCache` we neither keep them between runs nor have the files to check them
+        against, so we always scan.
+        """
+        if self.cache is None:
+            return None
+
+        with self._index_lock:
+            if self._index_fetch is None:
+                self._index_fetch = Future()
+                threading.Thread(target=self._fetch_search_index, args=(self._index_fetch,), daemon=True).start()
+
+        if not self._index_fetch.done():
+            return None
+
+        index = self._index_fetch.result()
+        if index is None:
+            # don't look again
+            self._channels_frame = None
+
+        return index
+
+    def _fetch_search_index(self, future: "Future[Optional[SearchIndex]]") -> None:
+        cache = cast(HTTPCache, self.cache)
+        try:
+            indexes = []
+            for channel, (filename, version) in zip(self.channels, self._channel_files):
+                index = SearchIndex.load(cache.get(self.uri + f"catalog-{channel}.index.feather"))
+
+                # the cached channel file might have been refreshed since we read it
+                checksum = _file_checksum(filename)
+                if _file_version(filename) != version or index.source != checksum:
+                    log.info("search_index.stale", channel=channel)
+                    future.set_result(None)
+                    return
+
+                indexes.append(index)
+
+            future.set_result(SearchIndex.concat(indexes))
+
+        except Exception as e:
+            # catalogs published before we had indexes don't have them
+            log.info("search_index.unavailable", error=str(e))
+            future.set_result(None)
 
 
 class CatalogFrame(pd.DataFrame):
@@ -290,8 +628,9 @@ class CatalogFrame(pd.DataFrame):
     """
 
     _base_uri: Optional[str] = None
+    _table_cache: Optional[TableCache] = None
 
-    _metadata = ["_base_uri"]
+    _metadata = ["_base_uri", "_table_cache"]
 
     @property
     def _constructor(self) -> type:
@@ -303,18 +642,99 @@ class CatalogFrame(pd.DataFrame):
         def build(*args: Any, **kwargs: Any) -> Any:
             c = CatalogSeries(*args, **kwargs)
             c._base_uri = self._base_uri
+            c._table_cache = self._table_cache
             return c
 
         return build
 
-    def load(self) -> Table:
+    def load(
+        self, columns: Optional[List[str]] = None, filters: Optional[Filters] = None, in_memory: bool = False
+    ) -> Table:
         if len(self) == 1:
-            return self.iloc[0].load()  # type: ignore
+            return self.iloc[0].load(columns=columns, filters=filters, in_memory=in_memory)  # type: ignore
         elif len(self) == 0:
             raise ValueError("no tables found")
         else:
             raise ValueError(f"only one table can be loaded at once (tables found: {', '.join(self.table.tolist())})")
 
+    def load_all(
+        self,
+        max_workers: int = LOAD_WORKERS,
+        errors: Literal["raise", "ignore", "warn"] = "raise",
+        columns: Optional[List[str]] = None,
+        filters: Optional[Filters] = None,
+    ) -> Dict[str, Table]:
+        """
+        Load all tables in the frame concurrently and return them keyed by path.
+
+        A failing table never aborts the other downloads. Once all of them are done:
+        - "raise" (default): raise a `LoadError` listing failures, it also carries the loaded tables
+        - "warn": log failures and return the tables that loaded
+        - "ignore": return the tables that loaded
+
+        `columns` and `filters` are passed to `load()` of every table.
+        """
+        rows: List[CatalogSeries] = [self.iloc[i] for i in range(len(self))]
+
+        def load(row: CatalogSeries) -> Union[Table, Exception]:
+            try:
+                return row.load(columns=columns, filters=filters)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(load, rows))
+
+        return self._collect_loaded(rows, results, errors)
+
+    async def aload_all(
+        self,
+        max_concurrency: int = LOAD_WORKERS,
+        errors: Literal["raise", "ignore", "warn"] = "raise",
+        columns: Optional[List[str]] = None,
+        filters: Optional[Filters] = None,
+    ) -> Dict[str, Table]:
+        """
+        Async version of `load_all()`, loading at most `max_concurrency` tables at once
+        without blocking the event loop.
+        """
+        rows: List[CatalogSeries] = [self.iloc[i] for i in range(len(self))]
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def load(row: CatalogSeries) -> Union[Table, Exception]:
+            async with semaphore:
+                try:
+                    return await row.aload(columns=columns, filters=filters)
+                except Exception as e:
+                    return e
+
+        results = await asyncio.gather(*[load(row) for row in rows])
+
+        return self._collect_loaded(rows, results, errors)
+
+    @staticmethod
+    def _collect_loaded(
+        rows: List["CatalogSeries"],
+        results: List[Union[Table, Exception]],
+        errors: Literal["raise", "ignore", "warn"],
+    ) -> Dict[str, Table]:
+        tables: Dict[str, Table] = {}
+        failures: Dict[str, Exception] = {}
+        for row, result in zip(rows, results):
+            if isinstance(result, Exception):
+                failures[row.path] = result
+            else:
+                tables[row.path] = result
+
+        if failures:
+            if errors == "raise":
+                raise LoadError(tables, failures)
+            elif errors == "warn":
+                for path, e in failures.items():
+                    log.warning("load_all.failed", path=path, error=str(e))
+
+        return tables
+
     @staticmethod
     def create_empty() -> "CatalogFrame":
         return CatalogFrame(
@@ -335,13 +755,74 @@ class CatalogSeries(pd.Series):
     in order to add a `load()` method onto it that will fetch and return a Table.
     """
 
-    _metadata = ["_base_uri"]
+    _base_uri: Optional[str] = None
+    _table_cache: Optional[TableCache] = None
+
+    _metadata = ["_base_uri", "_table_cache"]
 
     @property
     def _constructor(self) -> type:
         return CatalogSeries
 
-    def load(self) -> Table:
+    def load(
+        self, columns: Optional[List[str]] = None, filters: Optional[Filters] = None, in_memory: bool = False
+    ) -> Table:
+        """
+        Fetch the table this row describes.
+
+        :param columns: only load these columns (the primary key is always loaded)
+        :param filters: only load rows matching these filters, which needs the table to be
+            available in parquet format
+        :param in_memory: read private feather and parquet tables straight from memory
+            instead of downloading them to a temporary directory first
+        """
+        format = self._format(filters)
+        if self.path and format and self._base_uri:
+            uri = self._base_uri + self.path + "." + format
+
+            # keep backward compatibility
+            is_public = getattr(self, "is_public", True)
+
+            checksum = getattr(self, "checksum", None)
+            if self._table_cache and isinstance(checksum, str):
+                download = _download_public_file if is_public else _download_private_file
+                return Table.read(
+                    self._table_cache.fetch(self.path, checksum, format, partial(download, uri)),
+                    columns=columns,
+                    filters=filters,
+                )
+
+            if not is_public and in_memory and format in ("feather", "parquet"):
+                return _read_private_table(uri, columns=columns, filters=filters)
+
+            with tempfile.TemporaryDirectory() as tmpdir:
+                # download the data locally first if the file is private
+                if not is_public:
+                    uri = _download_private_file(uri, tmpdir)
+
+                return Table.read(uri, columns=columns, filters=filters)
+
+        raise ValueError("series is not a table spec")
+
+    def open(self) -> LazyTable:
+        """
+        Open the table this row describes without loading its data. Only the metadata is
+        fetched right away, the data is loaded with `load()` the first time it's needed.
+        """
+        format = self._format()
+        if not (self.path and format and self._base_uri):
+            raise ValueError("series is not a table spec")
+
+        uri = self._base_uri + self.path + "." + format
+        if getattr(self, "is_public", True):
+            metadata = Table._read_metadata(uri)
+        else:
+            base, _ = os.path.splitext(urlparse(uri).path)
+            metadata = json.loads(bytes(s3_utils.download_bytes(S3_OWID_URI + base + ".meta.json")))
+
+        return LazyTable(metadata, self.load)
+
+    def _format(self, filters: Optional[Filters] = None) -> Optional[str]:
         # determine what format to use for this table; old indexes gave one format,
         # new ones give multiple to choose from
         format = None
@@ -350,32 +831,36 @@ class CatalogSeries(pd.Series):
             format = self.format
         elif hasattr(self, "formats") and (self.formats is not None) and len(self.formats) > 0:
             format = PREFERRED_FORMAT if PREFERRED_FORMAT in self.formats else self.formats[0]
+            if filters is not None and "parquet" in self.formats:
+                # only parquet supports filtering rows while reading
+                format = "parquet"
 
-        if self.path and format and self._base_uri:
-            with tempfile.TemporaryDirectory() as tmpdir:
-                uri = self._base_uri + self.path + "." + format
+        return cast(Optional[str], format)
 
-                # download the data locally first if the file is private
-                # keep backward compatibility
-                if not getattr(self, "is_public", True):
-                    uri = _download_private_file(uri, tmpdir)
-
-                return Table.read(uri)
-
-        raise ValueError("series is not a table spec")
+    async def aload(
+        self, columns: Optional[List[str]] = None, filters: Optional[Filters] = None, in_memory: bool = False
+    ) -> Table:
+        """
+        Async version of `load()`. Downloading and decoding the table happen in the event
+        loop's default executor, so the event loop is free to serve other requests.
+        """
+        load = partial(self.load, columns=columns, filters=filters, in_memory=in_memory)
+        return await asyncio.get_running_loop().run_in_executor(None, load)
 
 
 def _load_remote_catalog(channels):
     global REMOTE_CATALOG
 
-    # add channel if missing and reinit remote catalog
-    if REMOTE_CATALOG and not (set(channels) <= set(REMOTE_CATALOG.channels)):
-        REMOTE_CATALOG = RemoteCatalog(channels=list(set(REMOTE_CATALOG.channels) | set(channels)))
+    # `afind()` calls us from executor threads, only one of them should fetch the catalog
+    with _REMOTE_CATALOG_LOCK:
+        # add channel if missing and reinit remote catalog
+        if REMOTE_CATALOG and not (set(channels) <= set(REMOTE_CATALOG.channels)):
+            REMOTE_CATALOG = RemoteCatalog(channels=list(set(REMOTE_CATALOG.channels) | set(channels)))
 
-    if not REMOTE_CATALOG:
-        REMOTE_CATALOG = RemoteCatalog(channels=channels)
+        if not REMOTE_CATALOG:
+            REMOTE_CATALOG = RemoteCatalog(channels=channels)
 
-    return REMOTE_CATALOG
+        return REMOTE_CATALOG
 
 
 def find(
@@ -390,8 +875,29 @@ def find(
     return REMOTE_CATALOG.find(table=table, namespace=namespace, version=version, dataset=dataset)
 
 
-def find_one(*args: Optional[str], **kwargs: Optional[str]) -> Table:
-    return find(*args, **kwargs).load()  # type: ignore
+def find_one(
+    *args: Optional[str],
+    columns: Optional[List[str]] = None,
+    filters: Optional[Filters] = None,
+    **kwargs: Optional[str],
+) -> Table:
+    return find(*args, **kwargs).load(columns=columns, filters=filters)  # type: ignore
+
+
+async def afind(
+    table: Optional[str] = None,
+    namespace: Optional[str] = None,
+    version: Optional[str] = None,
+    dataset: Optional[str] = None,
+    channels: Iterable[CHANNEL] = ("garden",),
+) -> "CatalogFrame":
+    """
+    Async version of `find()`, fetching the remote catalog on first use without blocking
+    the event loop.
+    """
+    catalog = await asyncio.get_running_loop().run_in_executor(None, partial(_load_remote_catalog, channels=channels))
+
+    return catalog.find(table=table, namespace=namespace, version=version, dataset=dataset)
 
 
 def find_latest(
@@ -407,36 +913,202 @@ def find_latest(
     return REMOTE_CATALOG.find_latest(table=table, namespace=namespace, dataset=dataset, version=version)
 
 
-def _download_private_file(uri: str, tmpdir: str) -> str:
-    parsed = urlparse(uri)
-    base, ext = os.path.splitext(parsed.path)
-    s3_utils.download(
-        S3_OWID_URI + base + ".meta.json",
-        tmpdir + "/data.meta.json",
-    )
-    s3_utils.download(
-        S3_OWID_URI + base + ext,
-        tmpdir + "/data" + ext,
+def _scan_dir(path: Path) -> Tuple[bool, List[str]]:
+    """
+    List a directory with a single `scandir` call, returning whether it is a dataset and
+    the names of its subdirectories. Entry types come from the directory listing itself,
+    so no extra `stat` calls are needed except for symlinks.
+    """
+    is_dataset = False
+    children = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.name == "index.json":
+                is_dataset = True
+            elif entry.is_dir():
+                children.append(entry.name)
+
+    return is_dataset, children
+
+
+def _index_dataset(
+    path: str, catalog_path: Path, previous: Optional[DatasetManifest] = None
+) -> Tuple[pd.DataFrame, DatasetManifest]:
+    """
+    Index a single dataset and describe the files it was indexed from. This is a top-level
+    function so that it can run in worker processes.
+    """
+    ds = Dataset(path)
+
+    # take stats before hashing, so that files changing in the meantime get reindexed next time
+    manifest = ds.file_stats()
+    file_checksums = ds.file_checksums(DEFAULT_HASH_ALGORITHM, cache=previous)
+    for filename, entry in manifest.items():
+        entry["checksum"] = file_checksums[os.path.join(ds.path, filename)]
+        entry["algorithm"] = DEFAULT_HASH_ALGORITHM
+
+    return ds.index(catalog_path, file_checksums), manifest
+
+
+def _is_unchanged(ds: Dataset, manifest: DatasetManifest) -> bool:
+    "Are the files of a dataset the same as in its manifest?"
+    try:
+        stats = ds.file_stats()
+    except FileNotFoundError:
+        return False
+
+    return stats.keys() == manifest.keys() and all(
+        stat["size"] == manifest[k]["size"] and stat["mtime_ns"] == manifest[k]["mtime_ns"] for k, stat in stats.items()
     )
+
+
+def _file_version(path: Path) -> Tuple[int, int, int]:
+    "Size, modification time and inode of a file, which change whenever it's replaced."
+    stat = path.stat()
+    return (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+def _file_checksum(path: Path) -> str:
+    "Checksum of a channel file, identifying the version of it a search index was built from."
+    return cast(str, checksum_file(str(path)).hexdigest())
+
+
+def _scan(frame: "CatalogFrame", table: Optional[str], values: List[Optional[str]]) -> npt.NDArray[np.int64]:
+    "Return the positions of rows matching a `find()` query by looking at all of them."
+    mask = np.ones(len(frame), dtype=bool)
+    for column, value in zip(HASH_COLUMNS, values):
+        if value:
+            mask &= (frame[column] == value).to_numpy(dtype=bool)
+
+    if table:
+        mask &= frame.table.str.contains(table, na=False).to_numpy(dtype=bool)
+
+    return np.flatnonzero(mask)
+
+
+def _search(
+    frame: "CatalogFrame", index: SearchIndex, table: Optional[str], values: List[Optional[str]]
+) -> npt.NDArray[np.int64]:
+    "Return the positions of rows matching a `find()` query using the search index of `frame`."
+    # intersect posting lists instead of scanning the whole frame; `None` means all rows
+    positions: Optional[npt.NDArray[np.int64]] = None
+    for column, value in zip(HASH_COLUMNS, values):
+        if value:
+            positions = _intersect(positions, index.lookup(column, value))
+
+    if table:
+        candidates = index.candidates(table)
+        if candidates is not None:
+            positions = _intersect(positions, candidates)
+
+        # the trigram index only gives candidates, so we still check the pattern on them
+        tables = frame.table if positions is None else frame.table.iloc[positions]
+        matched = tables.str.contains(table, na=False).to_numpy(dtype=bool)
+        positions = np.flatnonzero(matched) if positions is None else positions[matched]
+
+    if positions is None:
+        positions = np.arange(len(frame))
+
+    return positions
+
+
+def _intersect(positions: Optional[npt.NDArray[np.int64]], other: npt.NDArray[np.int64]) -> npt.NDArray[np.int64]:
+    "Intersect sorted row positions, where `None` stands for all rows."
+    if positions is None:
+        return other
+
+    return np.intersect1d(positions, other, assume_unique=True)
+
+
+def _download_public_file(uri: str, tmpdir: str) -> str:
+    base, ext = os.path.splitext(uri)
+    for src, dest in [(base + ".meta.json", tmpdir + "/data.meta.json"), (uri, tmpdir + "/data" + ext)]:
+        if src.startswith("http"):
+            resp = sessions.get(src, stream=True)
+            resp.raise_for_status()
+            with open(dest, "wb") as ostream:
+                for chunk in resp.iter_content(chunk_size=2**20):
+                    ostream.write(chunk)
+        else:
+            shutil.copy(src, dest)
+
     return tmpdir + "/data" + ext
 
 
+def _download_private_file(
+    uri: str, tmpdir: str, part_size: Optional[int] = None, max_concurrency: Optional[int] = None
+) -> str:
+    "Download a private table and its metadata at the same time, the table in parallel parts."
+    base, ext = os.path.splitext(urlparse(uri).path)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(s3_utils.download, S3_OWID_URI + base + ".meta.json", tmpdir + "/data.meta.json"),
+            executor.submit(
+                s3_utils.download,
+                S3_OWID_URI + base + ext,
+                tmpdir + "/data" + ext,
+                part_size=part_size,
+                max_concurrency=max_concurrency,
+            ),
+        ]
+        for future in futures:
+            future.result()
+
+    return tmpdir + "/data" + ext
+
+
+def _read_private_table(
+    uri: str,
+    columns: Optional[List[str]] = None,
+    filters: Optional[Filters] = None,
+    part_size: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+) -> Table:
+    "Read a private feather or parquet table from memory, without writing it to disk."
+    base, ext = os.path.splitext(urlparse(uri).path)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        meta = executor.submit(s3_utils.download_bytes, S3_OWID_URI + base + ".meta.json")
+        data = executor.submit(
+            s3_utils.download_bytes, S3_OWID_URI + base + ext, part_size=part_size, max_concurrency=max_concurrency
+        )
+        metadata = json.loads(bytes(meta.result()))
+        # wraps the downloaded buffer without copying it
+        source = pyarrow.BufferReader(data.result())
+
+    return ArrowTable.from_source(source, metadata, ext[1:], columns=columns, filters=filters).to_table()
+
+
 class PackageUpdateRequired(Exception):
     pass
 
 
+class LoadError(Exception):
+    """
+    Some tables failed to load. The tables that did load are in `tables` and the
+    exception of every failed one is in `errors`, both keyed by path.
+    """
+
+    def __init__(self, tables: Dict[str, Table], errors: Dict[str, Exception]) -> None:
+        super().__init__(f"failed to load {len(errors)} of {len(tables) + len(errors)} tables: {', '.join(errors)}")
+        self.tables = tables
+        self.errors = errors
+
+
 def read_frame(uri: Union[str, Path]) -> pd.DataFrame:
     if isinstance(uri, Path):
         uri = str(uri)
 
+    # fetch remote files with our shared session, reusing its connections
+    source: Any = io.BytesIO(sessions.get_bytes(uri)) if urlparse(uri).scheme in ("http", "https") else uri
+
     if uri.endswith(".feather"):
-        return cast(pd.DataFrame, pd.read_feather(uri))
+        return cast(pd.DataFrame, pd.read_feather(source))
 
     elif uri.endswith(".parquet"):
-        return cast(pd.DataFrame, pd.read_parquet(uri))
+        return cast(pd.DataFrame, pd.read_parquet(source))
 
     elif uri.endswith(".csv"):
-        return pd.read_csv(uri)
+        return pd.read_csv(source)
 
     raise ValueError(f"could not detect format of uri: {uri}")
 
@@ -0,0 +1,53 @@
+#
+#  cli.py
+#
+#  Command-line tools for managing local catalogs.
+#
+
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
+from .catalogs import LocalCatalog
+from .datasets import CHANNEL, PREFERRED_FORMAT
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="owid-catalog", description="Manage local OWID data catalogs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    reindex_parser = subparsers.add_parser("reindex", help="rebuild the index of a local catalog")
+    reindex_parser.add_argument("path", help="root folder of the catalog")
+    reindex_parser.add_argument(
+        "--channels",
+        nargs="+",
+        default=["garden"],
+        choices=CHANNEL.__args__,  # type: ignore
+        help="channels to index (default: garden)",
+    )
+    reindex_parser.add_argument("--include", help="only reindex datasets whose path matches this regex")
+    reindex_parser.add_argument(
+        "--workers", type=int, default=1, help="number of processes to index datasets with (default: 1)"
+    )
+    reindex_parser.add_argument(
+        "--incremental", action="store_true", help="only reindex datasets that changed since the last reindex"
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "reindex":
+        reindex(args.path, args.channels, include=args.include, workers=args.workers, incremental=args.incremental)
+
+
+def reindex(
+    path: str,
+    channels: List[CHANNEL],
+    include: Optional[str] = None,
+    workers: int = 1,
+    incremental: bool = False,
+) -> None:
+    if all((Path(path) / f"catalog-{channel}.{PREFERRED_FORMAT}").exists() for channel in channels):
+        LocalCatalog(path, channels=channels).reindex(include=include, workers=workers, incremental=incremental)
+    else:
+        # loading a catalog without an index builds one from scratch
+        LocalCatalog(path, channels=channels, workers=workers)
@@ -0,0 +1,211 @@
+#
+#  codecs.py
+#
+#  Fast to_dict / from_dict for our metadata dataclasses. Code for each class is
+#  generated once from its type hints, so that no reflection happens per call. The
+#  output is the same as that of `dataclasses_json`, which remains the fallback for
+#  anything unusual.
+#
+
+import dataclasses
+import warnings
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+
+# private helpers, so pyproject.toml only allows dataclasses-json versions we tested them with
+from dataclasses_json.core import _asdict, _decode_type
+
+# values that dataclasses_json copies as they are
+SCALARS = (str, int, float, bool, type(None))
+
+# values that `pruned_json` leaves out
+EMPTY = [None, [], {}]
+
+# unpruned encoders of every class we generated code for, used for nested dataclasses
+_NESTED_ENCODERS: Dict[type, Callable[[Any], Dict[str, Any]]] = {}
+
+
+def encode_value(obj: Any) -> Any:
+    "Encode an arbitrary value the way dataclasses_json does."
+    cls = obj.__class__
+    if cls in SCALARS:
+        return obj
+    if cls is list:
+        return [encode_value(v) for v in obj]
+    if cls is dict:
+        return {encode_value(k): encode_value(v) for k, v in obj.items()}
+
+    encoder = _NESTED_ENCODERS.get(cls)
+    if encoder is not None:
+        return encoder(obj)
+
+    return _asdict(obj)
+
+
+def compile_codecs(cls: Any) -> None:
+    """
+    Generate `to_dict` and `from_dict` for a `dataclass_json` class. `to_dict` leaves out
+    empty values like `pruned_json`, while nested dataclasses are encoded in full, just
+    like dataclasses_json does. The original methods are kept as `_dataclasses_json_to_dict`
+    and `_dataclasses_json_from_dict`, and used whenever extra arguments are given.
+    """
+    hints = get_type_hints(cls)
+    fields = [f for f in dataclasses.fields(cls)]
+    env: Dict[str, Any] = {
+        "cls": cls,
+        "SCALARS": SCALARS,
+        "EMPTY": EMPTY,
+        "MISSING": dataclasses.MISSING,
+        "encode_value": encode_value,
+        "decode_type": _decode_type,
+        "warn": warnings.warn,
+        "orig_to_dict": cls.to_dict,
+        "orig_from_dict": cls.from_dict.__func__,
+    }
+
+    # encoders
+    nested_lines = ["def asdict(self):", "    return {"]
+    pruned_lines = [
+        "def to_dict(self, **kwargs):",
+        "    if kwargs:",
+        "        return prune(orig_to_dict(self, **kwargs))",
+        "    d = {}",
+    ]
+    for f in fields:
+        encode = _encode_expression(f"self.{f.name}", hints[f.name], env)
+        nested_lines.append(f"        {f.name!r}: {encode},")
+        if f.name.startswith("_"):
+            continue
+        pruned_lines += [
+            f"    v = self.{f.name}",
+            "    if v.__class__ in SCALARS:",
+            "        if v is not None:",
+            f"            d[{f.name!r}] = v",
+            "    else:",
+            f"        v = {_encode_expression('v', hints[f.name], env)}",
+            "        if v not in EMPTY:",
+            f"            d[{f.name!r}] = v",
+        ]
+    nested_lines.append("    }")
+    pruned_lines.append("    return d")
+
+    # decoders
+    decode_lines = [
+        "def from_dict(cls, kvs, *, infer_missing=False):",
+        "    if infer_missing:",
+        "        return orig_from_dict(cls, kvs, infer_missing=infer_missing)",
+        "    if isinstance(kvs, cls):",
+        "        return kvs",
+        "    get = kvs.get",
+        "    kwargs = {}",
+    ]
+    for i, f in enumerate(fields):
+        if not f.init:
+            continue
+
+        if f.default is not dataclasses.MISSING:
+            env[f"default_{i}"] = f.default
+            default = f"default_{i}"
+        elif f.default_factory is not dataclasses.MISSING:  # type: ignore
+            env[f"default_factory_{i}"] = f.default_factory  # type: ignore
+            default = f"default_factory_{i}()"
+        else:
+            default = None
+
+        decode_lines.append(f"    v = get({f.name!r}, MISSING)")
+        decode_lines.append("    if v is MISSING:")
+        if default is None:
+            decode_lines.append(f"        raise KeyError({f.name!r})")
+        else:
+            decode_lines.append(f"        v = {default}")
+        decode_lines.append("    elif v is None:")
+        if _is_optional(hints[f.name]):
+            decode_lines.append("        pass")
+        else:
+            message = f"'NoneType' object value of non-optional type {f.name} detected when decoding {cls.__name__}."
+            decode_lines.append(f"        warn({message!r}, RuntimeWarning)")
+        decode_lines.append("    else:")
+        decode_lines.append(f"        v = {_decode_expression('v', hints[f.name], env, i)}")
+        decode_lines.append(f"    kwargs[{f.name!r}] = v")
+    decode_lines.append("    return cls(**kwargs)")
+
+    env["prune"] = lambda d: {k: v for k, v in d.items() if not k.startswith("_") and v not in EMPTY}
+    exec("\n".join(nested_lines + [""] + pruned_lines + [""] + decode_lines), env)
+
+    cls._dataclasses_json_to_dict = cls.to_dict
+    cls._dataclasses_json_from_dict = cls.from_dict
+    cls.to_dict = env["to_dict"]
+    cls.from_dict = classmethod(env["from_dict"])
+    _NESTED_ENCODERS[cls] = env["asdict"]
+
+
+def _is_optional(type_: Any) -> bool:
+    return get_origin(type_) is Union and type(None) in get_args(type_)
+
+
+def _strip_optional(type_: Any) -> Any:
+    if _is_optional(type_):
+        args = [a for a in get_args(type_) if a is not type(None)]  # noqa
+        if len(args) == 1:
+            return args[0]
+    return type_
+
+
+def _encode_expression(value: str, type_: Any, env: Dict[str, Any]) -> str:
+    "Python expression encoding `value` of the given type."
+    type_ = _strip_optional(type_)
+
+    if get_origin(type_) in (list, List):
+        (item_type,) = get_args(type_) or (Any,)
+        if dataclasses.is_dataclass(item_type) and item_type in _NESTED_ENCODERS:
+            name = f"encode_{item_type.__name__}"
+            env[name] = _NESTED_ENCODERS[item_type]
+            env[f"{item_type.__name__}"] = item_type
+            return (
+                f"([{name}(x) if x.__class__ is {item_type.__name__} else encode_value(x) for x in {value}]"
+                f" if {value}.__class__ is list else encode_value({value}))"
+            )
+
+    if type_ in (str, int, float, bool):
+        return f"({value} if {value}.__class__ in SCALARS else encode_value({value}))"
+
+    return f"encode_value({value})"
+
+
+def _decode_expression(value: str, type_: Any, env: Dict[str, Any], i: int) -> str:
+    "Python expression decoding a non-null `value` of the given type."
+    type_ = _strip_optional(type_)
+    origin = get_origin(type_)
+
+    if type_ in (str, int, float, bool):
+        name = type_.__name__
+        return f"({value} if isinstance({value}, {name}) else {name}({value}))"
+
+    if origin in (list, List):
+        (item_type,) = get_args(type_) or (Any,)
+        if item_type is str:
+            return f"[x if isinstance(x, str) else str(x) for x in {value}]"
+        if isinstance(item_type, type) and dataclasses.is_dataclass(item_type):
+            name = item_type.__name__
+            env[name] = item_type
+            return f"[x if isinstance(x, {name}) else {name}.from_dict(x) for x in {value}]"
+
+    if origin in (dict, Dict) and get_args(type_) == (str, Any):
+        return f"{{k if isinstance(k, str) else str(k): x for k, x in {value}.items()}}"
+
+    if isinstance(type_, type) and dataclasses.is_dataclass(type_):
+        name = type_.__name__
+        env[name] = type_
+        return f"({value} if isinstance({value}, {name}) else {name}.from_dict({value}))"
+
+    # anything else is left to dataclasses_json
+    env[f"type_{i}"] = type_
+    return f"decode_type(type_{i}, {value}, False)"
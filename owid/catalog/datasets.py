@@ -4,20 +4,25 @@
 
 import hashlib
 import json
+import os
 import shutil
+import threading
 import warnings
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from glob import glob
 from os import mkdir
-from os.path import join
+from os.path import basename, join
 from pathlib import Path
-from typing import Any, Iterator, List, Literal, Optional, Union
+from typing import Any, Dict, Iterator, List, Literal, Optional, Tuple, Union, cast
 
 import numpy as np
 import pandas as pd
 import yaml
 
 from . import tables, utils
+from .instrumentation import file_size, span
 from .meta import SOURCE_EXISTS_OPTIONS, DatasetMeta, TableMeta
 from .properties import metadata_property
 
@@ -41,6 +46,13 @@ assert SUPPORTED_FORMATS[0] == PREFERRED_FORMAT
 # available channels in the catalog
 CHANNEL = Literal["garden", "meadow", "grapher", "backport", "open_numbers", "examples", "explorers"]
 
+# the hash used for checksums unless told otherwise; it's what catalog indexes contain
+DEFAULT_HASH_ALGORITHM = "md5"
+
+# size, modification time and (optionally) checksum and its algorithm of each file of a dataset,
+# keyed by file name
+FileStats = Dict[str, Dict[str, Any]]
+
 # all pandas nullable dtypes
 NULLABLE_DTYPES = [f"{sign}{typ}{size}" for typ in ("Int", "Float") for sign in ("", "U") for size in (8, 16, 32, 64)]
 
@@ -83,9 +95,10 @@ class Dataset:
 
     def add(
         self,
-        table: tables.Table,
+        table: Union[tables.Table, tables.ArrowTable, tables.LazyTable],
         formats: List[FileFormat] = DEFAULT_FORMATS,
         repack: bool = True,
+        workers: int = 1,
     ) -> None:
         """
         Add this table to the dataset by saving it in the dataset's folder. By default we
@@ -94,20 +107,29 @@ class Dataset:
 
         :param repack: if True, try to cast column types to the smallest possible type (e.g. float64 -> float32)
             to reduce binary file size. Consider using False when your dataframe is large and the repack is failing.
+            Arrow tables are written as they are, without repacking.
+        :param workers: number of threads to write the formats with
         """
+        if isinstance(table, tables.LazyTable):
+            table = table.table
 
         utils.validate_underscore(table.metadata.short_name, "Table's short_name")
-        for col in list(table.columns) + list(table.index.names):
-            utils.validate_underscore(col, "Variable's name")
-
-        # check Float64 and Int64 columns for np.nan
-        for col, dtype in table.dtypes.items():
-            if dtype in NULLABLE_DTYPES:
-                # pandas nullable types like Float64 have their own pd.NA instead of np.nan
-                # make sure we don't use wrong nan, otherwise dropna and other methods won't work
-                assert (
-                    np.isnan(table[col]).sum() == 0
-                ), f"Column `{col}` is using np.nan, but it should be using pd.NA because it has type {table[col].dtype}"
+        if isinstance(table, tables.ArrowTable):
+            # arrow has proper nulls, so there's no np.nan to check for
+            for col in table.all_columns:
+                utils.validate_underscore(col, "Variable's name")
+        else:
+            for col in list(table.columns) + list(table.index.names):
+                utils.validate_underscore(col, "Variable's name")
+
+            # check Float64 and Int64 columns for np.nan
+            for col, dtype in table.dtypes.items():
+                if dtype in NULLABLE_DTYPES:
+                    # pandas nullable types like Float64 have their own pd.NA instead of np.nan
+                    # make sure we don't use wrong nan, otherwise dropna and other methods won't work
+                    assert (
+                        np.isnan(table[col]).sum() == 0
+                    ), f"Column `{col}` is using np.nan, but it should be using pd.NA because it has type {table[col].dtype}"
 
         # copy dataset metadata to the table
         table.metadata.dataset = self.metadata
@@ -116,8 +138,32 @@ class Dataset:
             if format not in SUPPORTED_FORMATS:
                 raise Exception(f"Format '{format}'' is not supported")
 
-            table_filename = join(self.path, table.metadata.checked_name + f".{format}")
-            table.to(table_filename, repack=repack)
+        # reset the index, repack and convert to Arrow only once for all binary formats
+        arrow_table: Optional[tables.ArrowTable] = None
+        if isinstance(table, tables.ArrowTable):
+            arrow_table = table
+        elif set(formats) - {"csv"}:
+            arrow_table = tables.ArrowTable.from_table(table, repack=repack)
+
+        stem = join(self.path, table.metadata.checked_name)
+
+        def write(format: FileFormat) -> None:
+            if isinstance(table, tables.Table) and format == "csv":
+                # csv isn't repacked, so we write it from the original table
+                table._write_csv(f"{stem}.csv")
+            else:
+                assert arrow_table is not None
+                arrow_table._write_data(f"{stem}.{format}")
+
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(write, formats))
+        else:
+            for format in formats:
+                write(format)
+
+        # all formats share the same metadata file
+        table._save_metadata(f"{stem}.meta.json")
 
     def __getitem__(self, name: str) -> tables.Table:
         stem = self.path / Path(name)
@@ -129,10 +175,27 @@ class Dataset:
 
         raise KeyError(f"Table `{name}` not found, available tables: {', '.join(self.table_names)}")
 
+    def open(self, name: str) -> tables.LazyTable:
+        "Open a table of the dataset without loading its data, see `Table.open()`."
+        stem = self.path / Path(name)
+
+        for format in SUPPORTED_FORMATS:
+            path = stem.with_suffix(f".{format}")
+            if path.exists():
+                return tables.Table.open(path)
+
+        raise KeyError(f"Table `{name}` not found, available tables: {', '.join(self.table_names)}")
+
     def __contains__(self, name: str) -> bool:
         return any((Path(self.path) / name).with_suffix(f".{format}").exists() for format in SUPPORTED_FORMATS)
 
-    def save(self) -> None:
+    def save(self, workers: int = 1) -> None:
+        """
+        Save the dataset metadata to `index.json` and to the metadata file of every table.
+        Tables' data is never read, only their metadata files are rewritten.
+
+        :param workers: number of threads to update the metadata files of tables with
+        """
         assert self.metadata.short_name, "Missing dataset short_name"
         utils.validate_underscore(self.metadata.short_name, "Dataset's short_name")
 
@@ -151,11 +214,18 @@ class Dataset:
         self.metadata.save(self._index_file)
 
         # Update the copy of this datasets metadata in every table in the set.
-        for table_name in self.table_names:
-            table = self[table_name]
+        def update(table_name: str) -> None:
+            table = self.open(table_name)
             table.metadata.dataset = self.metadata
             table._save_metadata(join(self.path, table.metadata.checked_name + ".meta.json"))
 
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(update, self.table_names))
+        else:
+            for table_name in self.table_names:
+                update(table_name)
+
     def update_metadata(self, metadata_path: Path, if_source_exists: SOURCE_EXISTS_OPTIONS = "replace") -> None:
         """
         Load YAML file with metadata from given path and update metadata of dataset and its tables.
@@ -167,24 +237,31 @@ class Dataset:
             - "append": append new source to existing ones
             - "fail": raise an exception if source already exists
         """
-        self.metadata.update_from_yaml(metadata_path, if_source_exists=if_source_exists)
-
         with open(metadata_path) as istream:
             metadata = yaml.safe_load(istream)
-            for table_name in metadata.get("tables", {}).keys():
-                table = self[table_name]
-                table.update_metadata_from_yaml(metadata_path, table_name)
-                table._save_metadata(join(self.path, table.metadata.checked_name + ".meta.json"))
 
-    def index(self, catalog_path: Path = Path("/")) -> pd.DataFrame:
+        self.metadata._update_from_annotation(metadata, if_source_exists=if_source_exists)
+
+        for table_name in metadata.get("tables", {}).keys():
+            # only the table's metadata file is read and rewritten, not its data
+            table = self.open(table_name)
+            tables._update_metadata_from_annotation(
+                table.metadata, table._fields, list(table.columns), metadata["tables"][table_name], table_name
+            )
+            table._save_metadata(join(self.path, table.metadata.checked_name + ".meta.json"))
+
+    def index(self, catalog_path: Path = Path("/"), file_checksums: Optional[Dict[str, str]] = None) -> pd.DataFrame:
         """
         Return a DataFrame describing the contents of this dataset, one row per table.
+
+        :param file_checksums: checksums of the dataset's files as given by `file_checksums()`,
+            if you already have them
         """
         base = {
             "namespace": self.metadata.namespace,
             "dataset": self.metadata.short_name,
             "version": self.metadata.version,
-            "checksum": self.checksum(),
+            "checksum": self.checksum(file_checksums),
             "is_public": self.metadata.is_public,
         }
         rows = []
@@ -241,18 +318,98 @@ class Dataset:
     def _metadata_files(self) -> List[str]:
         return sorted(glob(join(self.path, "*.meta.json")))
 
-    def checksum(self) -> str:
-        "Return a MD5 checksum of all data and metadata in the dataset."
-        _hash = hashlib.md5()
-        _hash.update(checksum_file(self._index_file).digest())
-
+    @property
+    def _checksum_files(self) -> List[str]:
+        "Files that make up the dataset checksum, in the order they get hashed."
+        files = [self._index_file]
         for data_file in self._data_files:
-            _hash.update(checksum_file(data_file).digest())
+            files.append(data_file)
+            files.append(Path(data_file).with_suffix(".meta.json").as_posix())
 
-            metadata_file = Path(data_file).with_suffix(".meta.json").as_posix()
-            _hash.update(checksum_file(metadata_file).digest())
+        return files
 
-        return _hash.hexdigest()
+    def file_stats(self) -> FileStats:
+        "Return the size and modification time of every data and metadata file in the dataset."
+        stats = {}
+        for filename in self._checksum_files:
+            st = os.stat(filename)
+            stats[basename(filename)] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+        return stats
+
+    def file_checksums(
+        self,
+        algorithm: str = DEFAULT_HASH_ALGORITHM,
+        workers: int = 1,
+        cache: Optional[FileStats] = None,
+    ) -> Dict[str, str]:
+        """
+        Return the checksum of every data and metadata file in the dataset.
+
+        A file is only read again if its size or modification time changed since it was
+        last hashed by this process.
+
+        :param algorithm: any algorithm from `hashlib`, or `xxh64`, `xxh3_64` and `xxh128`
+            if the `xxhash` package is installed
+        :param workers: number of threads to hash files with
+        :param cache: file stats with checksums of an earlier run, e.g. from a catalog manifest;
+            files that still match them and were hashed with the same `algorithm` are not
+            read either
+        """
+        filenames = list(dict.fromkeys(self._checksum_files))
+
+        def checksum(filename: str) -> str:
+            st = os.stat(filename)
+            key = (os.path.abspath(filename), algorithm)
+
+            cached = (cache or {}).get(basename(filename))
+            if (
+                cached
+                and cached.get("algorithm") == algorithm
+                and cached["size"] == st.st_size
+                and cached["mtime_ns"] == st.st_mtime_ns
+            ):
+                _cache_checksum(key, st.st_size, st.st_mtime_ns, cached["checksum"])
+                return cast(str, cached["checksum"])
+
+            value = _cached_checksum(key, st.st_size, st.st_mtime_ns)
+            if value is None:
+                value = checksum_file(filename, algorithm).hexdigest()
+                _cache_checksum(key, st.st_size, st.st_mtime_ns, value)
+
+            return value
+
+        if workers > 1:
+            # hash functions release the GIL on large buffers, so threads hash files in parallel
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                checksums = list(executor.map(checksum, filenames))
+        else:
+            checksums = [checksum(filename) for filename in filenames]
+
+        return dict(zip(filenames, checksums))
+
+    def checksum(
+        self,
+        file_checksums: Optional[Dict[str, str]] = None,
+        algorithm: str = DEFAULT_HASH_ALGORITHM,
+        workers: int = 1,
+    ) -> str:
+        """
+        Return a checksum of all data and metadata in the dataset, MD5 by default. See
+        `file_checksums()` for the arguments.
+        """
+        with span("dataset.checksum", path=self.path) as s:
+            if file_checksums is None:
+                file_checksums = self.file_checksums(algorithm, workers=workers)
+
+            _hash = new_hash(algorithm)
+            for filename in self._checksum_files:
+                _hash.update(bytes.fromhex(file_checksums[filename]))
+
+            if s:
+                s.bytes = sum(file_size(f) or 0 for f in set(self._checksum_files))
+
+        return cast(str, _hash.hexdigest())
 
 
 for k in DatasetMeta.__dataclass_fields__:
@@ -262,10 +419,50 @@ for k in DatasetMeta.__dataclass_fields__:
     setattr(Dataset, k, metadata_property(k))
 
 
-def checksum_file(filename: str) -> Any:
-    "Return the MD5 checksum of a given file."
+# checksums of files we've already read, keyed by path and algorithm, together with the size
+# and modification time they were read at; least recently used ones go beyond this many files
+CHECKSUM_CACHE_SIZE = 100_000
+
+_CHECKSUM_CACHE: "OrderedDict[Tuple[str, str], Tuple[int, int, str]]" = OrderedDict()
+_CHECKSUM_CACHE_LOCK = threading.Lock()
+
+
+def _cached_checksum(key: Tuple[str, str], size: int, mtime_ns: int) -> Optional[str]:
+    with _CHECKSUM_CACHE_LOCK:
+        entry = _CHECKSUM_CACHE.get(key)
+        if entry is None or entry[:2] != (size, mtime_ns):
+            return None
+
+        _CHECKSUM_CACHE.move_to_end(key)
+        return entry[2]
+
+
+def _cache_checksum(key: Tuple[str, str], size: int, mtime_ns: int, checksum: str) -> None:
+    with _CHECKSUM_CACHE_LOCK:
+        # a file that changed replaces its old entry
+        _CHECKSUM_CACHE[key] = (size, mtime_ns, checksum)
+        _CHECKSUM_CACHE.move_to_end(key)
+        while len(_CHECKSUM_CACHE) > CHECKSUM_CACHE_SIZE:
+            _CHECKSUM_CACHE.popitem(last=False)
+
+
+def new_hash(algorithm: str = DEFAULT_HASH_ALGORITHM) -> Any:
+    "Return a new hash object for any `hashlib` algorithm, or an `xxhash` one if it's installed."
+    if algorithm.startswith("xxh"):
+        try:
+            import xxhash  # type: ignore
+        except ImportError:
+            raise ValueError(f"hash algorithm `{algorithm}` needs the `xxhash` package, install it first")
+
+        return getattr(xxhash, algorithm)()
+
+    return hashlib.new(algorithm)
+
+
+def checksum_file(filename: str, algorithm: str = DEFAULT_HASH_ALGORITHM) -> Any:
+    "Return the checksum of a given file, MD5 by default."
     chunk_size = 2**20  # 1MB
-    checksum = hashlib.md5()
+    checksum = new_hash(algorithm)
     with open(filename, "rb") as istream:
         chunk = istream.read(chunk_size)
         while chunk:
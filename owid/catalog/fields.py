@@ -0,0 +1,155 @@
+#
+#  fields.py
+#
+#  Copy-on-write storage for metadata of table columns. Copying, renaming or joining
+#  tables shares `VariableMeta` objects between them, and an object is only copied once
+#  it is taken out of the dict, which is the only way it could get modified. Objects
+#  that have already been handed out might be modified at any time, so they are never
+#  shared.
+#
+
+import copy
+import dataclasses
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .meta import VariableMeta
+
+
+class CopyOnWriteFields(defaultdict):
+    """
+    Drop-in replacement for `defaultdict(VariableMeta, ...)` used for `Table._fields`. Keys
+    marked as shared hold an object that might also be in another table, and get their own
+    copy the first time they are accessed. Keys marked as private hold an object nobody
+    outside has a reference to, only these can be shared.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._shared: Set[str] = set()
+        self._private: Set[str] = set()
+
+    @classmethod
+    def from_dicts(cls, fields: Dict[str, Dict[str, Any]]) -> "CopyOnWriteFields":
+        "Create metadata from its dict form, e.g. when reading a table, so that it can be shared."
+        new = cls(VariableMeta, {k: VariableMeta.from_dict(v) for k, v in fields.items()})
+        new._private.update(new)
+        return new
+
+    def __getitem__(self, key: str) -> VariableMeta:
+        value = super().__getitem__(key)
+        if key in self._shared:
+            self._shared.discard(key)
+            value = copy_variable_meta(value)
+            dict.__setitem__(self, key, value)
+        # the caller might keep the object and modify it later
+        self._private.discard(key)
+        return value
+
+    def __setitem__(self, key: str, value: VariableMeta) -> None:
+        self._shared.discard(key)
+        self._private.discard(key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self._shared.discard(key)
+        self._private.discard(key)
+        super().__delitem__(key)
+
+    def get(self, key: str, default: Optional[VariableMeta] = None) -> Optional[VariableMeta]:  # type: ignore
+        return self[key] if key in self else default
+
+    def pop(self, key: str, *args: Any) -> VariableMeta:  # type: ignore
+        if key in self:
+            self[key]
+        return super().pop(key, *args)
+
+    def setdefault(self, key: str, default: VariableMeta) -> VariableMeta:  # type: ignore
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def popitem(self) -> Tuple[str, VariableMeta]:
+        key = next(reversed(list(self)))
+        return key, self.pop(key)
+
+    def clear(self) -> None:
+        self._shared.clear()
+        self._private.clear()
+        super().clear()
+
+    def update(self, *args: Any, **kwargs: Any) -> None:  # type: ignore
+        "Set keys through `__setitem__`, sharing the metadata of other `CopyOnWriteFields`."
+        for other in args + (kwargs,):
+            if isinstance(other, CopyOnWriteFields):
+                self.share(other, ((k, k) for k in other))
+            else:
+                for k, v in dict(other).items():
+                    self[k] = v
+
+    def __ior__(self, other: Any) -> "CopyOnWriteFields":  # type: ignore
+        self.update(other)
+        return self
+
+    def __or__(self, other: Any) -> "CopyOnWriteFields":  # type: ignore
+        new = self.copy()
+        new.update(other)
+        return new
+
+    def __ror__(self, other: Any) -> "CopyOnWriteFields":  # type: ignore
+        new = self.__class__(self.default_factory)
+        new.update(other)
+        new.update(self)
+        return new
+
+    def values(self) -> List[VariableMeta]:  # type: ignore
+        return [self[k] for k in list(self)]
+
+    def items(self) -> List[Tuple[str, VariableMeta]]:  # type: ignore
+        return [(k, self[k]) for k in list(self)]
+
+    def copy(self) -> "CopyOnWriteFields":
+        new = self.__class__(self.default_factory)
+        new.share(self, ((k, k) for k in self))
+        return new
+
+    def __copy__(self) -> "CopyOnWriteFields":
+        return self.copy()
+
+    def peek(self, key: str) -> VariableMeta:
+        "Get metadata without copying it, the caller must not modify it."
+        return super().__getitem__(key)
+
+    def share(self, fields: Dict[str, VariableMeta], keys: Iterable[Tuple[str, str]]) -> None:
+        """
+        Set `self[new_key] = fields[old_key]` for all `(new_key, old_key)` pairs without copying
+        metadata. Metadata that has been handed out or comes from a plain dict might still be
+        modified through other references, so it is copied right away.
+        """
+        for new_key, old_key in keys:
+            if isinstance(fields, CopyOnWriteFields):
+                meta = fields.peek(old_key)
+                shared = old_key in fields._private
+                if shared:
+                    fields._shared.add(old_key)
+            else:
+                meta = fields[old_key]
+                shared = False
+
+            dict.__setitem__(self, new_key, meta if shared else copy_variable_meta(meta))
+            if shared:
+                self._shared.add(new_key)
+            else:
+                self._shared.discard(new_key)
+            self._private.add(new_key)
+
+
+def copy_variable_meta(meta: VariableMeta) -> VariableMeta:
+    "Copy metadata of a variable, this is much faster than `copy.deepcopy`."
+    return dataclasses.replace(
+        meta,
+        sources=[dataclasses.replace(s) for s in meta.sources],
+        licenses=[dataclasses.replace(lic) for lic in meta.licenses],
+        display=copy.deepcopy(meta.display),
+        additional_info=copy.deepcopy(meta.additional_info),
+    )
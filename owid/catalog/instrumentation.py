@@ -0,0 +1,137 @@
+#
+#  instrumentation.py
+#
+#  Opt-in timing of I/O and metadata operations. Each operation is recorded as a span,
+#  logged through structlog and passed to hooks, e.g. to feed it into your own metrics.
+#  When instrumentation is disabled, a span costs a single check.
+#
+
+import contextlib
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, ContextManager, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import structlog
+
+log = structlog.get_logger()
+
+Hook = Callable[["Span"], None]
+
+# instrumentation can be turned on without touching code, e.g. in ETL steps
+_enabled = os.environ.get("OWID_CATALOG_INSTRUMENTATION", "") not in ("", "0")
+_log_spans = True
+_hooks: Tuple[Hook, ...] = ()
+
+
+@dataclass
+class Span:
+    operation: str
+    path: Optional[str] = None
+    format: Optional[str] = None
+    rows: Optional[int] = None
+    columns: Optional[int] = None
+    bytes: Optional[int] = None
+    cache_hit: Optional[bool] = None
+    # in seconds
+    duration: Optional[float] = None
+    # name of the exception raised by the operation, if any
+    error: Optional[str] = None
+
+    def set_shape(self, df: Any) -> None:
+        "Record number of rows and columns of a data frame or Arrow table."
+        self.rows = len(df)
+        self.columns = len(df.columns)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: v for k, v in self.__dict__.items() if v is not None}
+
+
+def enable(log_spans: bool = True) -> None:
+    """
+    Start recording spans. They're passed to all hooks and, if `log_spans` is set, logged
+    through structlog with the operation as the event name.
+    """
+    global _enabled, _log_spans
+    _enabled = True
+    _log_spans = log_spans
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def add_hook(hook: Hook) -> None:
+    "Call `hook(span)` for every finished span while instrumentation is enabled."
+    global _hooks
+    _hooks = _hooks + (hook,)
+
+
+def remove_hook(hook: Hook) -> None:
+    global _hooks
+    _hooks = tuple(h for h in _hooks if h is not hook)
+
+
+def span(operation: str, **fields: Any) -> ContextManager[Optional[Span]]:
+    """
+    Time the operation in the `with` block. The context manager gives you the span to
+    fill in rows, bytes and so on, or None when instrumentation is disabled, so that
+    gathering them costs nothing then:
+
+        with span("table.read", path=path) as s:
+            df = ...
+            if s:
+                s.set_shape(df)
+    """
+    if not _enabled:
+        return _DISABLED
+    return _Recorder(Span(operation, **fields))
+
+
+def file_size(path: str) -> Optional[int]:
+    "Size of a local file, None for URLs."
+    if urlparse(path).scheme in ("http", "https", "s3"):
+        return None
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+_DISABLED: ContextManager[None] = contextlib.nullcontext()
+
+
+class _Recorder:
+    __slots__ = ("span", "start")
+
+    def __init__(self, span: Span) -> None:
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self.start = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self.span.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.span.error = exc_type.__name__
+        _emit(self.span)
+
+
+def _emit(span: Span) -> None:
+    if _log_spans:
+        fields = span.to_dict()
+        log.info(fields.pop("operation"), **fields)
+
+    for hook in _hooks:
+        try:
+            hook(span)
+        except Exception as e:
+            # metrics should never break loading data
+            log.warning("instrumentation.hook_failed", hook=repr(hook), error=str(e))
@@ -12,16 +12,15 @@ from typing import Any, Dict, List, Literal, Optional, TypeVar, Union
 import yaml
 from dataclasses_json import dataclass_json
 
+from .codecs import compile_codecs
+
 T = TypeVar("T")
 
 
 def pruned_json(cls: T) -> T:
-    orig = cls.to_dict  # type: ignore
-
-    # only keep non-null public variables
-    cls.to_dict = lambda self, **kwargs: {  # type: ignore
-        k: v for k, v in orig(self, **kwargs).items() if not k.startswith("_") and v not in [None, [], {}]
-    }
+    # only keep non-null public variables in `to_dict`, using code generated for this class
+    # rather than going through dataclasses_json for every field (see `codecs.py`)
+    compile_codecs(cls)
 
     return cls
 
@@ -175,6 +174,10 @@ class DatasetMeta:
         with open(path) as istream:
             annot = yaml.safe_load(istream)
 
+        self._update_from_annotation(annot, if_source_exists=if_source_exists)
+
+    def _update_from_annotation(self, annot: Dict[str, Any], if_source_exists: SOURCE_EXISTS_OPTIONS = "fail") -> None:
+        "Like `update_from_yaml`, but from already parsed YAML."
         dataset_sources = annot.get("dataset", {}).get("sources", []) or []
 
         # update sources of dataset, if there are no sources in the new dataset, don't update existing ones
@@ -2,20 +2,37 @@
 It would make sense to move both into a shared module in the future or use some proper public library
 for working with S3 that is compatible with DigitalOcean's Spaces.
 """
+import io
 import logging
 import os
+import threading
 from os import path
-from typing import Any, Tuple
+from typing import Any, Dict, Optional, Tuple
 from urllib.parse import urlparse
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+from .instrumentation import file_size, span
+
 SPACES_ENDPOINT = "https://nyc3.digitaloceanspaces.com"
 S3_BASE = "s3://walden.nyc3.digitaloceanspaces.com"
 HTTPS_BASE = "https://walden.nyc3.digitaloceanspaces.com"
 AWS_PROFILE = os.environ.get("AWS_PROFILE", "default")
 
+# connections each client keeps open, use at least as many as threads transferring files at once
+MAX_POOL_CONNECTIONS = 32
+
+# files larger than this are downloaded in byte-range parts of this size, this many at once
+PART_SIZE = 16 * 2**20  # 16MB
+MAX_CONCURRENCY = 10
+
+# clients are thread-safe but slow to create, so we keep one per profile, endpoint and pool size
+_CLIENTS: Dict[Tuple[str, str, int], Any] = {}
+_CLIENTS_LOCK = threading.Lock()
+
 
 def upload(filename: str, relative_path: str, public: bool = False) -> str:
     """
@@ -54,43 +71,115 @@ def s3_bucket_key(url: str) -> Tuple[str, str]:
     return bucket, key
 
 
-def download(s3_url: str, filename: str, quiet: bool = False) -> None:
-    """Download the file at the S3 URL to the given local filename."""
+def download(
+    s3_url: str,
+    filename: str,
+    quiet: bool = False,
+    part_size: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+) -> None:
+    """
+    Download the file at the S3 URL to the given local filename. Large files are
+    fetched in parallel byte-range parts, see `transfer_config`.
+    """
     client = connect()
 
     bucket, key = s3_bucket_key(s3_url)
 
-    try:
-        client.download_file(bucket, key, filename)
-    except ClientError as e:
-        logging.error(e)
-        raise UploadError(e)
+    with span("s3.download", path=s3_url) as s:
+        try:
+            client.download_file(bucket, key, filename, Config=transfer_config(part_size, max_concurrency))
+        except ClientError as e:
+            logging.error(e)
+            raise UploadError(e)
+
+        if s:
+            s.bytes = file_size(filename)
 
     if not quiet:
         logging.info("DOWNLOADED", f"{s3_url} -> {filename}")
 
 
-def connect() -> Any:
-    "Return a connection to Walden's DigitalOcean space."
-    check_for_default_profile()
+def download_bytes(s3_url: str, part_size: Optional[int] = None, max_concurrency: Optional[int] = None) -> memoryview:
+    """
+    Download the file at the S3 URL into memory, in parallel parts like `download`. Returns
+    a view of the downloaded buffer rather than a copy, use `bytes()` on it to get one.
+    """
+    client = connect()
+
+    bucket, key = s3_bucket_key(s3_url)
 
-    session = boto3.Session(profile_name=AWS_PROFILE)
-    client = session.client(
-        service_name="s3",
-        endpoint_url=SPACES_ENDPOINT,
+    with span("s3.download", path=s3_url) as s:
+        buffer = io.BytesIO()
+        try:
+            client.download_fileobj(bucket, key, buffer, Config=transfer_config(part_size, max_concurrency))
+        except ClientError as e:
+            logging.error(e)
+            raise UploadError(e)
+
+        data = buffer.getbuffer()
+        if s:
+            s.bytes = data.nbytes
+
+    return data
+
+
+def transfer_config(part_size: Optional[int] = None, max_concurrency: Optional[int] = None) -> TransferConfig:
+    """
+    Settings for downloading files in parallel byte-range parts, defaulting to `PART_SIZE`
+    and `MAX_CONCURRENCY`. Keep `max_concurrency` below the clients' `MAX_POOL_CONNECTIONS`.
+    """
+    part_size = part_size or PART_SIZE
+    return TransferConfig(
+        multipart_threshold=part_size,
+        multipart_chunksize=part_size,
+        max_concurrency=max_concurrency or MAX_CONCURRENCY,
     )
-    return client
 
 
-def check_for_default_profile() -> None:
+def connect(
+    profile: Optional[str] = None,
+    endpoint_url: str = SPACES_ENDPOINT,
+    max_pool_connections: int = MAX_POOL_CONNECTIONS,
+) -> Any:
+    """
+    Return a connection to Walden's DigitalOcean space. Clients are created once for
+    each profile, endpoint and pool size, and shared by all threads.
+    """
+    profile = profile or AWS_PROFILE
+    key = (profile, endpoint_url, max_pool_connections)
+
+    with _CLIENTS_LOCK:
+        if key not in _CLIENTS:
+            check_for_default_profile(profile)
+
+            # sessions aren't thread-safe, so each client gets its own
+            session = boto3.Session(profile_name=profile)
+            _CLIENTS[key] = session.client(
+                service_name="s3",
+                endpoint_url=endpoint_url,
+                config=Config(max_pool_connections=max_pool_connections),
+            )
+
+        return _CLIENTS[key]
+
+
+def clear_clients() -> None:
+    "Forget all clients, e.g. after changing credentials."
+    with _CLIENTS_LOCK:
+        _CLIENTS.clear()
+
+
+def check_for_default_profile(profile: Optional[str] = None) -> None:
+    profile = profile or AWS_PROFILE
     filename = path.expanduser("~/.aws/config")
-    if not path.exists(filename) or f"[{AWS_PROFILE}]" not in open(filename).read():
+    if not path.exists(filename) or f"[{profile}]" not in open(filename).read():
         raise MissingCredentialsError(
             f"""you must set up a config file at ~/.aws/config
 
 it should look like:
 
-[{AWS_PROFILE}]
+[{profile}]
 aws_access_key_id = ...
 aws_secret_access_key = ...
 region = ...
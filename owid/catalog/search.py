@@ -0,0 +1,144 @@
+#
+#  search.py
+#
+#  Inverted indexes over the catalog frame, used to speed up `find()`.
+#
+
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+import pyarrow
+import pyarrow.feather as feather
+
+# the column we support substring search on
+TRIGRAM_COLUMN = "table"
+
+# the columns we support exact lookups on
+HASH_COLUMNS = ["namespace", "version", "dataset", "channel"]
+
+# characters that make a search pattern a regex rather than a plain substring
+RE_SPECIAL = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+EMPTY = np.array([], dtype=np.int64)
+
+
+def trigrams(s: str) -> Set[str]:
+    return {s[i : i + 3] for i in range(len(s) - 2)}
+
+
+class SearchIndex:
+    """
+    Posting lists of row positions in a catalog frame: a trigram index over table names
+    for substring search, plus hash indexes over the columns that `find()` matches exactly.
+    The checksum of the catalog file it was built from is kept as `source`, so that
+    stale indexes can be told apart without looking at the frame.
+    """
+
+    def __init__(
+        self, postings: Dict[str, Dict[Any, npt.NDArray[np.int64]]], n_rows: int, source: Optional[str] = None
+    ) -> None:
+        self.postings = postings
+        self.n_rows = n_rows
+        self.source = source
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, source: Optional[str] = None) -> "SearchIndex":
+        postings: Dict[str, Dict[Any, npt.NDArray[np.int64]]] = {}
+        positions = pd.Series(np.arange(len(frame), dtype=np.int64))
+
+        if TRIGRAM_COLUMN in frame.columns:
+            grams: Dict[str, List[int]] = defaultdict(list)
+            for i, name in enumerate(frame[TRIGRAM_COLUMN]):
+                if isinstance(name, str):
+                    for gram in trigrams(name):
+                        grams[gram].append(i)
+            postings[TRIGRAM_COLUMN] = {k: np.array(v, dtype=np.int64) for k, v in grams.items()}
+
+        for column in HASH_COLUMNS:
+            if column in frame.columns:
+                groups = positions.groupby(frame[column].to_numpy(), sort=False).indices
+                postings[column] = {k: v.astype(np.int64) for k, v in groups.items()}
+
+        return cls(postings, len(frame), source)
+
+    @staticmethod
+    def concat(indexes: Iterable["SearchIndex"]) -> "SearchIndex":
+        """Combine indexes of frames that get concatenated in the same order."""
+        postings: Dict[str, Dict[Any, List[npt.NDArray[np.int64]]]] = defaultdict(lambda: defaultdict(list))
+        offset = 0
+        for index in indexes:
+            for column, column_postings in index.postings.items():
+                for key, rows in column_postings.items():
+                    postings[column][key].append(rows + offset)
+            offset += index.n_rows
+
+        return SearchIndex(
+            {column: {k: np.concatenate(v) for k, v in p.items()} for column, p in postings.items()},
+            offset,
+        )
+
+    def lookup(self, column: str, value: Any) -> npt.NDArray[np.int64]:
+        "Return the sorted positions of rows where `column` equals `value`."
+        return self.postings.get(column, {}).get(value, EMPTY)
+
+    def candidates(self, pattern: str) -> Optional[npt.NDArray[np.int64]]:
+        """
+        Return the sorted positions of rows whose table name could contain `pattern`,
+        or None if the index cannot narrow it down (short patterns and regexes). The
+        candidates are a superset of the matches, callers still need to verify them.
+        """
+        if RE_SPECIAL.search(pattern):
+            return None
+
+        grams = trigrams(pattern)
+        if not grams:
+            return None
+
+        table_postings = self.postings.get(TRIGRAM_COLUMN, {})
+
+        # intersect the rarest trigrams first to keep intermediate results small
+        result: Optional[npt.NDArray[np.int64]] = None
+        for gram in sorted(grams, key=lambda g: len(table_postings.get(g, EMPTY))):
+            rows = table_postings.get(gram, EMPTY)
+            result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+            if len(result) == 0:
+                break
+
+        return result
+
+    def save(self, path: Union[str, Path]) -> None:
+        records = [
+            (column, str(key), rows)
+            for column, column_postings in self.postings.items()
+            for key, rows in column_postings.items()
+        ]
+        t = pyarrow.table(
+            {
+                "column": pyarrow.array([r[0] for r in records], pyarrow.string()),
+                "key": pyarrow.array([r[1] for r in records], pyarrow.string()),
+                "positions": pyarrow.array([r[2] for r in records], pyarrow.list_(pyarrow.int64())),
+            }
+        )
+        t = t.replace_schema_metadata({"n_rows": str(self.n_rows), "source": self.source or ""})
+        feather.write_feather(t, str(path))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "SearchIndex":
+        t = feather.read_table(str(path))
+        n_rows = int(t.schema.metadata[b"n_rows"])
+        source = t.schema.metadata.get(b"source", b"").decode() or None
+
+        postings: Dict[str, Dict[Any, npt.NDArray[np.int64]]] = defaultdict(dict)
+        for column, key, rows in zip(
+            t.column("column").to_pylist(),
+            t.column("key").to_pylist(),
+            t.column("positions").to_numpy(zero_copy_only=False),
+        ):
+            postings[column][key] = rows.astype(np.int64)
+
+        return cls(dict(postings), n_rows, source)
@@ -0,0 +1,107 @@
+#
+#  sessions.py
+#
+#  A shared HTTP session for everything we fetch from remote catalogs, so that loading
+#  many tables reuses connections instead of opening a new one for every file.
+#
+
+import threading
+from typing import Any, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# connections kept open per host, use at least as many as threads loading tables at once
+POOL_SIZE = 16
+
+# seconds to wait for a connection and then for the server to send data
+TIMEOUT: Tuple[float, float] = (10.0, 60.0)
+
+# failed connections and these statuses are retried, waiting `backoff_factor * 2^n` seconds
+RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session: Optional[requests.Session] = None
+_lock = threading.Lock()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    "Adapter with a default timeout for requests that don't set their own."
+
+    def __init__(self, timeout: Tuple[float, float] = TIMEOUT, **kwargs: Any) -> None:
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request: Any, **kwargs: Any) -> requests.Response:  # type: ignore
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def configure(
+    pool_size: int = POOL_SIZE,
+    timeout: Tuple[float, float] = TIMEOUT,
+    retries: int = RETRIES,
+    backoff_factor: float = BACKOFF_FACTOR,
+) -> requests.Session:
+    """
+    Replace the shared session with one using these settings and return it. Requests in
+    flight finish on the old session, which is closed once nothing uses it anymore.
+
+    :param pool_size: number of connections kept alive per host
+    :param timeout: seconds to wait for connecting and for reading a response
+    :param retries: how many times to retry failed connections and 429 and 5xx responses
+    :param backoff_factor: wait `backoff_factor * 2^n` seconds before the n-th retry
+    """
+    global _session
+
+    session = _new_session(pool_size, timeout, retries, backoff_factor)
+    with _lock:
+        # other threads might still be using the old session, so we leave closing its
+        # connections to the garbage collector
+        _session = session
+
+    return session
+
+
+def get_session() -> requests.Session:
+    "Return the shared session, created with default settings on first use."
+    global _session
+
+    with _lock:
+        if _session is None:
+            _session = _new_session(POOL_SIZE, TIMEOUT, RETRIES, BACKOFF_FACTOR)
+        return _session
+
+
+def get(url: str, **kwargs: Any) -> requests.Response:
+    "GET a URL with the shared session, see `requests.get`."
+    return get_session().get(url, **kwargs)
+
+
+def get_bytes(url: str) -> bytes:
+    "Download the whole file at a URL, raising an error for failed responses."
+    resp = get(url)
+    resp.raise_for_status()
+    return resp.content
+
+
+def _new_session(pool_size: int, timeout: Tuple[float, float], retries: int, backoff_factor: float) -> requests.Session:
+    session = requests.Session()
+    adapter = TimeoutHTTPAdapter(
+        timeout=timeout,
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            # give us the last response, so that `raise_for_status` tells what went wrong
+            raise_on_status=False,
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
@@ -2,28 +2,52 @@
 #  tables.py
 #
 
-import copy
 import dataclasses
+import io
 import json
 from collections import defaultdict
+from contextlib import closing
+from functools import partial
 from os.path import dirname, join, splitext
 from pathlib import Path
-from typing import Any, Dict, List, Literal, Optional, Union, cast, overload
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+    overload,
+)
+from urllib.parse import urlparse
 
 import pandas as pd
 import pyarrow
+import pyarrow.feather as feather
 import pyarrow.parquet as pq
-import requests
 import structlog
 import yaml
 from owid.repack import repack_frame
 from pandas.util._decorators import rewrite_axis_style_signature
 
-from . import variables
+from . import sessions, variables
+from .fields import CopyOnWriteFields
+from .instrumentation import file_size, span
 from .meta import Source, TableMeta, VariableMeta
 
 log = structlog.get_logger()
 
+# row filters in pyarrow's disjunctive normal form, e.g. [("country", "in", ["France", "Spain"])]
+Filters = Union[List[Tuple[str, str, Any]], List[List[Tuple[str, str, Any]]]]
+
+# default number of rows per chunk in Table.iter_batches()
+BATCH_SIZE = 2**16
+
 SCHEMA = json.load(open(join(dirname(__file__), "schemas", "table.json")))
 METADATA_FIELDS = list(SCHEMA["properties"])
 
@@ -83,7 +107,7 @@ class Table(pd.DataFrame):
 
         # all columns have empty metadata by default
         assert not hasattr(self, "_fields")
-        self._fields = defaultdict(VariableMeta)
+        self._fields = CopyOnWriteFields(VariableMeta)
 
         # underscore column names
         if underscore:
@@ -119,22 +143,124 @@ class Table(pd.DataFrame):
         else:
             raise ValueError(f"could not detect a suitable format to save to: {path}")
 
+    @overload
+    @classmethod
+    def read(
+        cls,
+        path: Union[str, Path],
+        columns: Optional[List[str]] = None,
+        filters: Optional[Filters] = None,
+        memory_map: bool = False,
+        backend: Literal["pandas"] = "pandas",
+    ) -> "Table":
+        ...
+
+    @overload
+    @classmethod
+    def read(
+        cls,
+        path: Union[str, Path],
+        columns: Optional[List[str]] = None,
+        filters: Optional[Filters] = None,
+        memory_map: bool = False,
+        *,
+        backend: Literal["arrow"],
+    ) -> "ArrowTable":
+        ...
+
     @classmethod
-    def read(cls, path: Union[str, Path]) -> "Table":
+    def read(
+        cls,
+        path: Union[str, Path],
+        columns: Optional[List[str]] = None,
+        filters: Optional[Filters] = None,
+        memory_map: bool = False,
+        backend: Literal["pandas", "arrow"] = "pandas",
+    ) -> Union["Table", "ArrowTable"]:
+        """
+        Read a table in one of our SUPPORTED_FORMATS, detected from its extension.
+
+        :param columns: only load these columns (the primary key is always loaded)
+        :param filters: only load rows matching these filters, parquet files only
+        :param memory_map: memory map the file, feather files only (see `read_feather`)
+        :param backend: "arrow" returns an `ArrowTable` that keeps the data in Arrow format,
+            skipping the conversion to pandas (feather and parquet only)
+        """
         if isinstance(path, Path):
             path = path.as_posix()
 
+        if backend == "arrow":
+            return ArrowTable.read(path, columns=columns, filters=filters, memory_map=memory_map)
+
+        if filters is not None and not path.endswith(".parquet"):
+            raise ValueError(f"row filters are only supported for parquet files: {path}")
+
+        if memory_map and not path.endswith(".feather"):
+            raise ValueError(f"memory mapping is only supported for feather files: {path}")
+
         if path.endswith(".csv"):
-            return cls.read_csv(path)
+            return cls.read_csv(path, columns=columns)
 
         elif path.endswith(".feather"):
-            return cls.read_feather(path)
+            return cls.read_feather(path, columns=columns, memory_map=memory_map)
 
         elif path.endswith(".parquet"):
-            return cls.read_parquet(path)
+            return cls.read_parquet(path, columns=columns, filters=filters)
 
         raise ValueError(f"could not detect a suitable format to read from: {path}")
 
+    @classmethod
+    def iter_batches(
+        cls, path: Union[str, Path], batch_size: int = BATCH_SIZE, columns: Optional[List[str]] = None
+    ) -> Generator["Table", None, None]:
+        """
+        Read a local feather or parquet file in chunks of at most `batch_size` rows, each a
+        table with the metadata from the JSON sidecar. Only one chunk is held in memory at
+        a time, which lets callers aggregate or export tables that don't fit in memory.
+
+        :param columns: only load these columns (the primary key is always loaded)
+        """
+        if isinstance(path, Path):
+            path = path.as_posix()
+
+        metadata = cls._read_metadata(path)
+        columns = _with_primary_key(columns, metadata.get("primary_key", []))
+
+        if path.endswith(".feather"):
+            batches = _iter_feather_batches(path, batch_size, columns)
+        elif path.endswith(".parquet"):
+            batches = _iter_parquet_batches(path, batch_size, columns)
+        else:
+            raise ValueError(f"only feather and parquet files can be read in batches: {path}")
+
+        # close the file as soon as we're closed, rather than whenever `batches` is collected
+        with closing(batches):
+            for batch in batches:
+                df = Table(batch.to_pandas())
+                # _add_metadata consumes the dict, so give each chunk its own copy
+                cls._add_metadata(df, path, dict(metadata))
+                yield df
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> "LazyTable":
+        """
+        Open a table without loading its data. The metadata comes from the JSON sidecar
+        right away, the data is only read the first time it's needed.
+        """
+        if isinstance(path, Path):
+            path = path.as_posix()
+
+        if not path.endswith((".csv", ".feather", ".parquet")):
+            raise ValueError(f"could not detect a suitable format to read from: {path}")
+
+        metadata = cls._read_metadata(path)
+
+        # the schema of local files is cheap to read and gives the same columns as loading
+        # the data would, remote ones rely on the fields listed in the sidecar
+        column_names = None if urlparse(path).scheme in ("http", "https") else _read_column_names(path)
+
+        return LazyTable(metadata, partial(cls.read, path), column_names=column_names)
+
     # Mypy complaints about this not matching the defintiion of NDFrame.to_csv but I don't understand why
     def to_csv(self, path: Any, **kwargs: Any) -> None:  # type: ignore
         """
@@ -145,14 +271,21 @@ class Table(pd.DataFrame):
         if not isinstance(path, str) or not path.endswith(".csv"):
             raise ValueError(f'filename must end in ".csv": {path}')
 
+        with span("table.write", path=path, format="csv") as s:
+            self._write_csv(path, **kwargs)
+
+            metadata_filename = splitext(path)[0] + ".meta.json"
+            self._save_metadata(metadata_filename)
+            if s:
+                s.set_shape(self)
+                s.bytes = file_size(path)
+
+    def _write_csv(self, path: str, **kwargs: Any) -> None:
         df = pd.DataFrame(self)
         # if the dataframe uses the default index then we don't want to store it (would be a column of row numbers)
         save_index = self.primary_key != []
         df.to_csv(path, index=save_index, **kwargs)
 
-        metadata_filename = splitext(path)[0] + ".meta.json"
-        self._save_metadata(metadata_filename)
-
     def to_feather(
         self,
         path: Any,
@@ -163,12 +296,34 @@ class Table(pd.DataFrame):
         """
         Save this table as a feather file plus accompanying JSON metadata file.
         If the table is stored at "mytable.feather", the metadata will be at
-        "mytable.meta.json".
+        "mytable.meta.json". Uncompressed files are written as a single chunk, so
+        that they can be memory mapped without copying, see `read_feather`.
         """
         if not isinstance(path, str) or not path.endswith(".feather"):
             raise ValueError(f'filename must end in ".feather": {path}')
 
-        # feather can't store the index
+        with span("table.write", path=path, format="feather") as s:
+            data = self._to_arrow(repack)
+            if compression == "uncompressed":
+                # columns split across chunks are concatenated, i.e. copied, when read
+                kwargs.setdefault("chunksize", max(data.num_rows, 1))
+            feather.write_feather(data, path, compression=compression, **kwargs)
+
+            self._save_metadata(self.metadata_filename(path))
+            if s:
+                s.set_shape(self)
+                s.bytes = file_size(path)
+
+    def metadata_filename(self, path: str):
+        return splitext(path)[0] + ".meta.json"
+
+    def _to_arrow(self, repack: bool = True) -> pyarrow.Table:
+        """
+        Convert to Arrow the way we store tables on disk, with the primary key as regular
+        columns. This is the expensive part of saving a table.
+        """
+        # feather can't store the index and repacking is wasted on index columns, so
+        # we get rid of the index first
         df = pd.DataFrame(self)
         if self.primary_key:
             overlapping_names = set(self.index.names) & set(self.columns)
@@ -179,14 +334,13 @@ class Table(pd.DataFrame):
         if repack:
             # use smaller data types wherever possible
             # NOTE: this can be slow for large dataframes
-            df = repack_frame(df)
+            with span("table.repack") as s:
+                df = repack_frame(df)
+                if s:
+                    s.set_shape(df)
 
-        df.to_feather(path, compression=compression, **kwargs)
-
-        self._save_metadata(self.metadata_filename(path))
-
-    def metadata_filename(self, path: str):
-        return splitext(path)[0] + ".meta.json"
+        # some metadata gets auto-generated in the schema to help pandas deserialise better, we want to keep that
+        return pyarrow.Table.from_pandas(df)
 
     def to_parquet(self, path: Any, repack: bool = True) -> None:  # type: ignore
         """
@@ -198,20 +352,14 @@ class Table(pd.DataFrame):
         if not isinstance(path, str) or not path.endswith(".parquet"):
             raise ValueError(f'filename must end in ".parquet": {path}')
 
-        # parquet can store the index, but repacking is wasted on index columns so
-        # we get rid of the index first
-        df = pd.DataFrame(self)
-        if self.primary_key:
-            df = df.reset_index()
-
-        if repack:
-            # use smaller data types wherever possible
-            # NOTE: this can be slow for large dataframes
-            df = repack_frame(df)
+        with span("table.write", path=path, format="parquet") as s:
+            self._write_parquet(path, repack)
+            if s:
+                s.set_shape(self)
+                s.bytes = file_size(path)
 
-        # create a pyarrow table with metadata in the schema
-        # (some metadata gets auto-generated to help pandas deserialise better, we want to keep that)
-        t = pyarrow.Table.from_pandas(df)
+    def _write_parquet(self, path: str, repack: bool) -> None:
+        t = self._to_arrow(repack)
 
         # adding metadata would make reading partial content inefficient, see https://github.com/owid/etl/issues/783
         # new_metadata = {
@@ -229,17 +377,14 @@ class Table(pd.DataFrame):
         self._save_metadata(self.metadata_filename(path))
 
     def _save_metadata(self, filename: str) -> None:
-        # write metadata
-        with open(filename, "w") as ostream:
-            metadata = self.metadata.to_dict()  # type: ignore
-            metadata["primary_key"] = self.primary_key
-            metadata["fields"] = self._get_fields_as_dict()
-            json.dump(metadata, ostream, indent=2, default=str)
+        _write_sidecar(filename, self.metadata, self.primary_key, self._get_fields_as_dict())
 
     @classmethod
-    def read_csv(cls, path: Union[str, Path]) -> "Table":
+    def read_csv(cls, path: Union[str, Path], columns: Optional[List[str]] = None) -> "Table":
         """
         Read the table from csv plus accompanying JSON sidecar.
+
+        :param columns: only load these columns (the primary key is always loaded)
         """
         if isinstance(path, Path):
             path = path.as_posix()
@@ -247,17 +392,31 @@ class Table(pd.DataFrame):
         if not path.endswith(".csv"):
             raise ValueError(f'filename must end in ".csv": {path}')
 
-        # load the data
-        df = Table(pd.read_csv(path, index_col=False, na_values=[""], keep_default_na=False))
+        with span("table.read", path=path, format="csv") as s:
+            df = cls._read_csv(path, columns)
+            if s:
+                s.set_shape(df)
+                s.bytes = file_size(path)
+        return df
 
+    @classmethod
+    def _read_csv(cls, path: str, columns: Optional[List[str]] = None) -> "Table":
         # load the metadata
         metadata = cls._read_metadata(path)
 
         primary_key = metadata.pop("primary_key") if "primary_key" in metadata else []
         fields = metadata.pop("fields") if "fields" in metadata else {}
 
+        # load the data
+        usecols = _with_primary_key(columns, primary_key)
+        df = Table(pd.read_csv(_source(path), index_col=False, na_values=[""], keep_default_na=False, usecols=usecols))
+        if usecols is not None:
+            # csv keeps the file's column order, the other formats keep the requested one
+            df = df[usecols]
+            fields = {k: v for k, v in fields.items() if k in usecols}
+
         df.metadata = TableMeta(**metadata)
-        df._fields = defaultdict(VariableMeta, {k: VariableMeta.from_dict(v) for k, v in fields.items()})
+        df._fields = CopyOnWriteFields.from_dicts(fields)
 
         if primary_key:
             df.set_index(primary_key, inplace=True)
@@ -265,12 +424,17 @@ class Table(pd.DataFrame):
         return df
 
     @classmethod
-    def _add_metadata(cls, df: pd.DataFrame, path: str) -> None:
-        """Read metadata from JSON sidecar and add it to the dataframe."""
-        metadata = cls._read_metadata(path)
+    def _add_metadata(cls, df: pd.DataFrame, path: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Read metadata from JSON sidecar and add it to the dataframe. Metadata of columns
+        that weren't loaded is left out.
+        """
+        if metadata is None:
+            metadata = cls._read_metadata(path)
 
         primary_key = metadata.get("primary_key", [])
         fields = metadata.pop("fields") if "fields" in metadata else {}
+        fields = {k: v for k, v in fields.items() if k in df.columns}
 
         df.metadata = TableMeta.from_dict(metadata)
         df._set_fields_from_dict(fields)
@@ -279,11 +443,23 @@ class Table(pd.DataFrame):
             df.set_index(primary_key, inplace=True)
 
     @classmethod
-    def read_feather(cls, path: Union[str, Path]) -> "Table":
+    def read_feather(
+        cls, path: Union[str, Path], columns: Optional[List[str]] = None, memory_map: bool = False
+    ) -> "Table":
         """
         Read the table from feather plus accompanying JSON sidecar.
 
         The path may be a local file path or a URL.
+
+        :param columns: only load these columns (the primary key is always loaded), other
+            columns are never read from disk
+        :param memory_map: memory map a local file instead of reading it, so that processes
+            loading the same file share the OS page cache. Only columns of files saved with
+            `compression="uncompressed"` in a single chunk (as `to_feather` does) can be
+            zero-copy, and only numeric and boolean columns without missing values are;
+            other columns (strings, categoricals, dates, anything with nulls) are still
+            converted into new arrays. Zero-copy columns are read-only, copy the table
+            before modifying them in place.
         """
         if isinstance(path, Path):
             path = path.as_posix()
@@ -291,17 +467,40 @@ class Table(pd.DataFrame):
         if not path.endswith(".feather"):
             raise ValueError(f'filename must end in ".feather": {path}')
 
-        # load the data and add metadata
-        df = Table(pd.read_feather(path))
-        cls._add_metadata(df, path)
+        if memory_map and urlparse(path).scheme in ("http", "https"):
+            raise ValueError(f"only local files can be memory mapped: {path}")
+
+        with span("table.read", path=path, format="feather") as s:
+            # we need the primary key from the metadata before deciding which columns to read
+            metadata = cls._read_metadata(path)
+            columns = _with_primary_key(columns, metadata.get("primary_key", []))
+
+            # load the data and add metadata
+            if memory_map:
+                # give each column its own block, so that pandas doesn't copy them to consolidate
+                t = feather.read_table(path, columns=columns, memory_map=True)
+                df = Table(t.to_pandas(split_blocks=True))
+            else:
+                df = Table(pd.read_feather(_source(path), columns=columns))
+            cls._add_metadata(df, path, metadata)
+            if s:
+                s.set_shape(df)
+                s.bytes = file_size(path)
         return df
 
     @classmethod
-    def read_parquet(cls, path: Union[str, Path]) -> "Table":
+    def read_parquet(
+        cls, path: Union[str, Path], columns: Optional[List[str]] = None, filters: Optional[Filters] = None
+    ) -> "Table":
         """
         Read the table from a parquet file plus accompanying JSON sidecar.
 
         The path may be a local file path or a URL.
+
+        :param columns: only load these columns (the primary key is always loaded), other
+            columns are never read from disk
+        :param filters: only load rows matching these filters, e.g. `[("year", ">=", 2000)]`;
+            row groups whose statistics rule out a match are skipped without being decoded
         """
         if isinstance(path, Path):
             path = path.as_posix()
@@ -309,26 +508,47 @@ class Table(pd.DataFrame):
         if not path.endswith(".parquet"):
             raise ValueError(f'filename must end in ".parquet": {path}')
 
-        # load the data and add metadata
-        df = Table(pd.read_parquet(path))
-        cls._add_metadata(df, path)
+        with span("table.read", path=path, format="parquet") as s:
+            # we need the primary key from the metadata before deciding which columns to read
+            metadata = cls._read_metadata(path)
+
+            # load the data and add metadata
+            df = Table(
+                pd.read_parquet(
+                    _source(path), columns=_with_primary_key(columns, metadata.get("primary_key", [])), filters=filters
+                )
+            )
+            cls._add_metadata(df, path, metadata)
+            if s:
+                s.set_shape(df)
+                s.bytes = file_size(path)
         return df
 
     def _get_fields_as_dict(self) -> Dict[str, Any]:
-        return {col: self._fields[col].to_dict() for col in self.all_columns}
+        # read metadata without copying it
+        fields = self._fields
+        get = fields.peek if isinstance(fields, CopyOnWriteFields) else fields.__getitem__
+        return {col: get(col).to_dict() for col in self.all_columns}
 
     def _set_fields_from_dict(self, fields: Dict[str, Any]) -> None:
-        self._fields = defaultdict(VariableMeta, {k: VariableMeta.from_dict(v) for k, v in fields.items()})
+        self._fields = CopyOnWriteFields.from_dicts(fields)
 
     @staticmethod
     def _read_metadata(data_path: str) -> Dict[str, Any]:
         metadata_path = splitext(data_path)[0] + ".meta.json"
 
-        if metadata_path.startswith("http"):
-            return cast(Dict[str, Any], requests.get(metadata_path).json())
+        with span("metadata.read", path=metadata_path) as s:
+            if metadata_path.startswith("http"):
+                resp = sessions.get(metadata_path)
+                resp.raise_for_status()
+                if s:
+                    s.bytes = len(resp.content)
+                return cast(Dict[str, Any], resp.json())
 
-        with open(metadata_path, "r") as istream:
-            return cast(Dict[str, Any], json.load(istream))
+            with open(metadata_path, "r") as istream:
+                if s:
+                    s.bytes = file_size(metadata_path)
+                return cast(Dict[str, Any], json.load(istream))
 
     def __setitem__(self, key: Any, value: Any) -> Any:
         super().__setitem__(key, value)
@@ -354,25 +574,23 @@ class Table(pd.DataFrame):
         """Rename columns while keeping their metadata."""
         inplace = kwargs.get("inplace")
         old_cols = self.all_columns
-        new_table = super().rename(*args, **kwargs)
+        renamed = super().rename(*args, **kwargs)
+        new_table = self if inplace else cast(Table, renamed)
 
+        # construct new _fields attribute, metadata is only copied once modified
         if inplace:
-            new_table = self
-
-        # construct new _fields attribute
-        fields = {
-            new_col: self._fields[old_col] if inplace
-            # avoid deepcopy if inplace to make it faster
-            else copy.deepcopy(self._fields[old_col])
-            for old_col, new_col in zip(old_cols, new_table.all_columns)
-        }
-
-        new_table._fields = defaultdict(VariableMeta, fields)
+            new_table._fields = CopyOnWriteFields(
+                VariableMeta,
+                {new_col: self._fields[old_col] for old_col, new_col in zip(old_cols, new_table.all_columns)},
+            )
+        else:
+            new_table._fields = CopyOnWriteFields(VariableMeta)
+            new_table._fields.share(self._fields, zip(new_table.all_columns, old_cols))
 
         if inplace:
             return None
         else:
-            return cast(Table, new_table)
+            return new_table
 
     @property
     def all_columns(self) -> List[str]:
@@ -390,37 +608,14 @@ class Table(pd.DataFrame):
         with open(path) as istream:
             annot = yaml.safe_load(istream)
 
-        self.metadata.short_name = table_name
-
-        t_annot = annot["tables"][table_name]
-
-        # validation
-        if extra_variables == "raise":
-            yaml_variable_names = t_annot.get("variables", {}).keys()
-            table_variable_names = self.columns
-            extra_variable_names = yaml_variable_names - table_variable_names
-            if extra_variable_names:
-                raise ValueError(f"Table {table_name} has extra variables: {extra_variable_names}")
-
-        # update variables
-        for v_short_name, v_annot in (t_annot.get("variables", {}) or {}).items():
-            if v_short_name in self.columns:
-                for k, v in v_annot.items():
-                    # create an object out of sources
-                    if k == "sources":
-                        self[v_short_name].metadata.sources = [Source(**source) for source in v]
-                    else:
-                        setattr(self[v_short_name].metadata, k, v)
-
-        # update table attributes
-        for k, v in t_annot.items():
-            if k != "variables":
-                setattr(self.metadata, k, v)
+        _update_metadata_from_annotation(
+            self.metadata, self._fields, list(self.columns), annot["tables"][table_name], table_name, extra_variables
+        )
 
     def prune_metadata(self) -> "Table":
         """Prune metadata for columns that are not in the table. This can happen after slicing
         the table by columns."""
-        self._fields = {col: self._fields[col] for col in self.all_columns}
+        self._fields = CopyOnWriteFields(VariableMeta, {col: self._fields[col] for col in self.all_columns})
         return self
 
     def copy(self, deep: bool = True) -> "Table":
@@ -448,14 +643,12 @@ class Table(pd.DataFrame):
             if missing_columns:
                 log.warning(f"Missing columns in table: {missing_columns}")
 
-        # NOTE: copying with `dataclasses.replace` is much faster than `copy.deepcopy`
-        new_fields = defaultdict(VariableMeta)
+        # NOTE: metadata is shared with the other table and only copied once modified
+        new_fields = CopyOnWriteFields(VariableMeta)
         for k in common_columns:
             # copy if we have metadata in the other table
             if k in table._fields:
-                v = table._fields[k]
-                new_fields[k] = dataclasses.replace(v)
-                new_fields[k].sources = [dataclasses.replace(s) for s in v.sources]
+                new_fields.share(table._fields, [(k, k)])
             # otherwise keep current metadata (if it exists)
             elif k in self._fields:
                 new_fields[k] = self._fields[k]
@@ -517,15 +710,442 @@ class Table(pd.DataFrame):
             t._fields = self._fields
             return t  # type: ignore
 
-    def join(self, other: Union[pd.DataFrame, "Table"], *args, **kwargs) -> "Table":
+    def join(self, other: Union[pd.DataFrame, "Table", "LazyTable"], *args, **kwargs) -> "Table":
         """Fix type signature of join."""
+        if isinstance(other, LazyTable):
+            other = other.table
+
         t = super().join(other, *args, **kwargs)
 
         t.copy_metadata_from(self, errors="ignore")
 
         # copy variables metadata from other table
         if isinstance(other, Table):
-            for k, v in other._fields.items():
-                t._fields[k] = dataclasses.replace(v)
-                t._fields[k].sources = [dataclasses.replace(s) for s in v.sources]
+            t._fields.share(other._fields, [(k, k) for k in other._fields])
         return t  # type: ignore
+
+
+def _with_primary_key(columns: Optional[List[str]], primary_key: List[str]) -> Optional[List[str]]:
+    "Columns to read from a file, the primary key first so that we can index by it."
+    if columns is None:
+        return None
+
+    return list(primary_key) + [c for c in columns if c not in primary_key]
+
+
+class ArrowTable:
+    """
+    A table whose data is a `pyarrow.Table` rather than a DataFrame, with the same
+    metadata as `Table`. It's meant for moving data between catalog files (copying,
+    subsetting, publishing) without converting to pandas and back. Primary key
+    columns are regular columns of `data`.
+
+    Read one with `Table.read(path, backend="arrow")` and save it with `Dataset.add()`
+    or `to()`, or convert it with `to_table()` when you need pandas after all.
+    """
+
+    def __init__(
+        self,
+        data: pyarrow.Table,
+        metadata: Optional[TableMeta] = None,
+        fields: Optional[Dict[str, VariableMeta]] = None,
+        primary_key: Optional[List[str]] = None,
+    ) -> None:
+        self.data = data
+        self.metadata = metadata or TableMeta()
+        self._fields: Dict[str, VariableMeta] = defaultdict(VariableMeta, fields or {})
+        self.primary_key = list(primary_key or [])
+
+    @classmethod
+    def read(
+        cls,
+        path: Union[str, Path],
+        columns: Optional[List[str]] = None,
+        filters: Optional[Filters] = None,
+        memory_map: bool = False,
+    ) -> "ArrowTable":
+        "Read a feather or parquet file plus accompanying JSON sidecar, see `Table.read`."
+        if isinstance(path, Path):
+            path = path.as_posix()
+
+        if filters is not None and not path.endswith(".parquet"):
+            raise ValueError(f"row filters are only supported for parquet files: {path}")
+
+        if memory_map and not path.endswith(".feather"):
+            raise ValueError(f"memory mapping is only supported for feather files: {path}")
+
+        if not path.endswith((".feather", ".parquet")):
+            raise ValueError(f"only feather and parquet files can be read with the arrow backend: {path}")
+
+        is_remote = urlparse(path).scheme in ("http", "https")
+        if memory_map and is_remote:
+            raise ValueError(f"only local files can be memory mapped: {path}")
+
+        metadata = Table._read_metadata(path)
+
+        with span("table.read", path=path, format=splitext(path)[1][1:]) as s:
+            # pyarrow can't read from URLs on its own
+            source: Any = pyarrow.BufferReader(sessions.get_bytes(path)) if is_remote else path
+            t = cls.from_source(source, metadata, splitext(path)[1][1:], columns, filters, memory_map)
+
+            if s:
+                s.rows = len(t)
+                s.columns = len(t.columns)
+                s.bytes = source.size() if is_remote else file_size(path)
+
+        return t
+
+    @classmethod
+    def from_source(
+        cls,
+        source: Any,
+        metadata: Dict[str, Any],
+        format: str,
+        columns: Optional[List[str]] = None,
+        filters: Optional[Filters] = None,
+        memory_map: bool = False,
+    ) -> "ArrowTable":
+        """
+        Read a table from anything pyarrow can read, e.g. a `pyarrow.BufferReader` over
+        bytes already in memory, given the contents of its JSON sidecar.
+        """
+        metadata = dict(metadata)
+        primary_key = metadata.get("primary_key", [])
+        fields = metadata.pop("fields") if "fields" in metadata else {}
+        columns = _with_primary_key(columns, primary_key)
+
+        if format == "feather":
+            data = feather.read_table(source, columns=columns, memory_map=memory_map)
+        elif format == "parquet":
+            data = pq.read_table(source, columns=columns, filters=filters)
+        else:
+            raise ValueError(f"only feather and parquet files can be read with the arrow backend: {format}")
+
+        return cls(
+            data,
+            metadata=TableMeta.from_dict(metadata),
+            fields={k: VariableMeta.from_dict(v) for k, v in fields.items() if k in data.column_names},
+            primary_key=primary_key,
+        )
+
+    @classmethod
+    def from_table(cls, table: Union[Table, "LazyTable"], repack: bool = False) -> "ArrowTable":
+        if isinstance(table, LazyTable):
+            table = table.table
+
+        return cls(
+            table._to_arrow(repack),
+            metadata=table.metadata,
+            fields={k: v for k, v in table._fields.items() if k in table.all_columns},
+            primary_key=table.primary_key,
+        )
+
+    def to_table(self) -> Table:
+        "Convert to a pandas-backed `Table`."
+        t = Table(self.data.to_pandas(), metadata=self.metadata)
+        t._fields = CopyOnWriteFields(VariableMeta, self._fields)
+        if self.primary_key:
+            t.set_index(self.primary_key, inplace=True)
+        return t
+
+    @property
+    def all_columns(self) -> List[str]:
+        "Return names of all columns in the table, including the primary key."
+        return self.primary_key + self.columns
+
+    @property
+    def columns(self) -> List[str]:
+        return [c for c in self.data.column_names if c not in self.primary_key]
+
+    def __len__(self) -> int:
+        return cast(int, self.data.num_rows)
+
+    def select(self, columns: List[str]) -> "ArrowTable":
+        "Return a table with only these columns, plus the primary key."
+        columns = cast(List[str], _with_primary_key(columns, self.primary_key))
+        return ArrowTable(
+            self.data.select(columns),
+            metadata=self.metadata,
+            fields={k: v for k, v in self._fields.items() if k in columns},
+            primary_key=self.primary_key,
+        )
+
+    def to(self, path: Union[str, Path], repack: bool = True) -> None:
+        """
+        Save this table in one of our SUPPORTED_FORMATS plus accompanying JSON sidecar.
+        Feather and parquet files are written straight from Arrow; `repack` is ignored
+        since the data already has the types it was read with.
+        """
+        if isinstance(path, Path):
+            path = path.as_posix()
+
+        self._write_data(path)
+        self._save_metadata(splitext(path)[0] + ".meta.json")
+
+    def _write_data(self, path: str) -> None:
+        with span("table.write", path=path, format=splitext(path)[1][1:]) as s:
+            self._write_format(path)
+            if s:
+                s.rows = len(self)
+                s.columns = len(self.columns)
+                s.bytes = file_size(path)
+
+    def _write_format(self, path: str) -> None:
+        if path.endswith(".csv"):
+            # csv files should look the same no matter which backend wrote them
+            self.to_table()._write_csv(path)
+
+        elif path.endswith(".feather"):
+            feather.write_feather(self.data, path, compression="zstd")
+
+        elif path.endswith(".parquet"):
+            pq.write_table(self.data, path)
+
+        else:
+            raise ValueError(f"could not detect a suitable format to save to: {path}")
+
+    def _save_metadata(self, filename: str) -> None:
+        _write_sidecar(
+            filename, self.metadata, self.primary_key, {col: self._fields[col].to_dict() for col in self.all_columns}
+        )
+
+    def __repr__(self) -> str:
+        return f"<ArrowTable {self.metadata.short_name or ''} rows={len(self)} columns={self.all_columns}>"
+
+
+def _forward_operator(name: str) -> Callable[..., Any]:
+    "Forward an operator of `LazyTable` to its loaded table, loading other lazy operands too."
+
+    def operator(self: "LazyTable", *args: Any) -> Any:
+        return getattr(self.table, name)(*[a.table if isinstance(a, LazyTable) else a for a in args])
+
+    operator.__name__ = name
+    return operator
+
+
+class LazyTable:
+    """
+    A table whose metadata is available right away, but whose data is only loaded when
+    it's first needed, e.g. when accessing a column or calling a DataFrame method. The
+    loaded table is kept in `table` and everything that isn't metadata is forwarded to it.
+    """
+
+    def __init__(
+        self,
+        metadata: Dict[str, Any],
+        loader: Callable[[], Table],
+        column_names: Optional[List[str]] = None,
+    ) -> None:
+        metadata = dict(metadata)
+        self.primary_key: List[str] = metadata.get("primary_key") or []
+        fields = metadata.pop("fields", None) or {}
+
+        if column_names is not None:
+            # like loading the table, leave out metadata of columns that aren't there
+            fields = {k: v for k, v in fields.items() if k in column_names}
+
+        self.metadata = TableMeta.from_dict(metadata)
+        self._fields: Dict[str, VariableMeta] = defaultdict(
+            VariableMeta, {k: VariableMeta.from_dict(v) for k, v in fields.items()}
+        )
+        self._column_names = column_names if column_names is not None else (list(fields) if fields else None)
+        self._loader = loader
+        self._table: Optional[Table] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._table is not None
+
+    @property
+    def table(self) -> Table:
+        "The table with its data, loaded on first access."
+        if self._table is None:
+            t = self._loader()
+
+            # keep any changes made to the metadata before loading
+            t.metadata = self.metadata
+            t._fields = CopyOnWriteFields(VariableMeta, {k: v for k, v in self._fields.items() if k in t.all_columns})
+            self._table = t
+
+        return self._table
+
+    def load(self) -> Table:
+        return self.table
+
+    def _save_metadata(self, filename: str) -> None:
+        "Save the metadata the same way the loaded table would, without loading it."
+        _write_sidecar(
+            filename, self.metadata, self.primary_key, {col: self._fields[col].to_dict() for col in self.all_columns}
+        )
+
+    @property
+    def all_columns(self) -> List[str]:
+        "Return names of all columns in the table, including the index."
+        if self._column_names is None:
+            return self.table.all_columns
+
+        return self.primary_key + [c for c in self._column_names if c not in self.primary_key]
+
+    @property
+    def columns(self) -> pd.Index:
+        return pd.Index([c for c in self.all_columns if c not in self.primary_key])
+
+    def __getattr__(self, name: str) -> Any:
+        # private attributes are never forwarded, which also avoids loading the data
+        # when copying or pickling; operators are forwarded by `_forward_operator`
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        return getattr(self.table, name)
+
+    def __getitem__(self, key: Any) -> Any:
+        return self.table[key]
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __iter__(self) -> Iterator[str]:
+        # like a DataFrame, iterate over column names
+        return iter(self.columns)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.columns
+
+    # python looks operators up on the class, so `__getattr__` never sees them
+    __add__ = _forward_operator("__add__")
+    __radd__ = _forward_operator("__radd__")
+    __sub__ = _forward_operator("__sub__")
+    __rsub__ = _forward_operator("__rsub__")
+    __mul__ = _forward_operator("__mul__")
+    __rmul__ = _forward_operator("__rmul__")
+    __truediv__ = _forward_operator("__truediv__")
+    __rtruediv__ = _forward_operator("__rtruediv__")
+    __floordiv__ = _forward_operator("__floordiv__")
+    __rfloordiv__ = _forward_operator("__rfloordiv__")
+    __mod__ = _forward_operator("__mod__")
+    __rmod__ = _forward_operator("__rmod__")
+    __pow__ = _forward_operator("__pow__")
+    __rpow__ = _forward_operator("__rpow__")
+    __and__ = _forward_operator("__and__")
+    __rand__ = _forward_operator("__rand__")
+    __or__ = _forward_operator("__or__")
+    __ror__ = _forward_operator("__ror__")
+    __xor__ = _forward_operator("__xor__")
+    __rxor__ = _forward_operator("__rxor__")
+    __eq__ = _forward_operator("__eq__")
+    __ne__ = _forward_operator("__ne__")
+    __lt__ = _forward_operator("__lt__")
+    __le__ = _forward_operator("__le__")
+    __gt__ = _forward_operator("__gt__")
+    __ge__ = _forward_operator("__ge__")
+    __neg__ = _forward_operator("__neg__")
+    __pos__ = _forward_operator("__pos__")
+    __abs__ = _forward_operator("__abs__")
+    __invert__ = _forward_operator("__invert__")
+    __array__ = _forward_operator("__array__")
+
+    def __repr__(self) -> str:
+        if self._table is not None:
+            return repr(self._table)
+
+        return f"<LazyTable {self.metadata.short_name or ''} columns={list(self.all_columns)} (not loaded)>"
+
+
+def _iter_feather_batches(
+    path: str, batch_size: int, columns: Optional[List[str]] = None
+) -> Generator[pyarrow.RecordBatch, None, None]:
+    # record batches are decoded one at a time, the file is memory mapped rather than read;
+    # it's unmapped once we're exhausted or closed
+    with pyarrow.memory_map(path) as source:
+        options = None
+        if columns is not None:
+            schema = pyarrow.ipc.open_file(source).schema
+            missing = set(columns) - set(schema.names)
+            if missing:
+                raise ValueError(f"columns not found in {path}: {sorted(missing)}")
+            options = pyarrow.ipc.IpcReadOptions(included_fields=[schema.get_field_index(c) for c in columns])
+
+        reader = pyarrow.ipc.open_file(source, options=options)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            if columns is not None:
+                # included fields keep the file's column order
+                batch = pyarrow.RecordBatch.from_arrays([batch.column(c) for c in columns], names=columns)
+            for offset in range(0, batch.num_rows, batch_size):
+                yield batch.slice(offset, batch_size)
+
+
+def _iter_parquet_batches(
+    path: str, batch_size: int, columns: Optional[List[str]] = None
+) -> Generator[pyarrow.RecordBatch, None, None]:
+    with pyarrow.OSFile(path) as source:
+        yield from pq.ParquetFile(source).iter_batches(batch_size=batch_size, columns=columns)
+
+
+def _update_metadata_from_annotation(
+    metadata: TableMeta,
+    fields: Dict[str, VariableMeta],
+    columns: List[str],
+    t_annot: Dict[str, Any],
+    table_name: str,
+    extra_variables: Literal["raise", "ignore"] = "raise",
+) -> None:
+    """
+    Update metadata of a table and its variables from the parsed YAML annotation of the
+    table, see `Table.update_metadata_from_yaml`. It only needs the table's metadata and
+    column names, not its data.
+    """
+    metadata.short_name = table_name
+
+    # validation
+    if extra_variables == "raise":
+        yaml_variable_names = t_annot.get("variables", {}).keys()
+        extra_variable_names = yaml_variable_names - set(columns)
+        if extra_variable_names:
+            raise ValueError(f"Table {table_name} has extra variables: {extra_variable_names}")
+
+    # update variables
+    for v_short_name, v_annot in (t_annot.get("variables", {}) or {}).items():
+        if v_short_name in columns:
+            for k, v in v_annot.items():
+                # create an object out of sources
+                if k == "sources":
+                    fields[v_short_name].sources = [Source(**source) for source in v]
+                else:
+                    setattr(fields[v_short_name], k, v)
+
+    # update table attributes
+    for k, v in t_annot.items():
+        if k != "variables":
+            setattr(metadata, k, v)
+
+
+def _write_sidecar(filename: str, metadata: TableMeta, primary_key: List[str], fields: Dict[str, Any]) -> None:
+    "Write the JSON metadata file that accompanies a data file."
+    with open(filename, "w") as ostream:
+        d = metadata.to_dict()  # type: ignore
+        d["primary_key"] = primary_key
+        d["fields"] = fields
+        json.dump(d, ostream, indent=2, default=str)
+
+
+def _source(path: str) -> Union[str, io.BytesIO]:
+    "Something pandas can read from, files at URLs are downloaded with our shared session."
+    if urlparse(path).scheme in ("http", "https"):
+        return io.BytesIO(sessions.get_bytes(path))
+    return path
+
+
+def _read_column_names(path: str) -> List[str]:
+    "Read column names from the schema of a data file, without reading the data."
+    if path.endswith(".feather"):
+        with pyarrow.OSFile(path) as source:
+            names = pyarrow.ipc.open_file(source).schema.names
+    elif path.endswith(".parquet"):
+        with pyarrow.OSFile(path) as source:
+            names = pq.read_schema(source).names
+    else:
+        names = list(pd.read_csv(path, nrows=0).columns)
+
+    # parquet files may contain an unnamed pandas index
+    return [n for n in names if not n.startswith("__index_level_")]
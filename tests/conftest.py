@@ -0,0 +1,66 @@
+#
+#  conftest.py
+#
+
+import threading
+from contextlib import contextmanager
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Iterator, List
+
+import pytest
+
+
+class RecordingHandler(SimpleHTTPRequestHandler):
+    """
+    Serve files over HTTP/1.1, remembering the status of every response and the client
+    port of every request, and failing the first requests with 503 if told to.
+    """
+
+    protocol_version = "HTTP/1.1"
+    statuses: List[int]
+    ports: List[int]
+    failures: List[int]
+
+    def do_GET(self) -> None:
+        self.ports.append(self.client_address[1])
+        if self.failures:
+            self.send_error(self.failures.pop())
+            return
+        super().do_GET()
+
+    def send_response(self, code: int, message: Any = None) -> None:
+        self.statuses.append(code)
+        super().send_response(code, message)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@contextmanager
+def _serve(path: Path, failures: int = 0) -> Iterator[Any]:
+    handler = type("Handler", (RecordingHandler,), {"statuses": [], "ports": [], "failures": [503] * failures})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(handler, directory=str(path)))
+    server.statuses = handler.statuses  # type: ignore
+    server.ports = handler.ports  # type: ignore
+    server.uri = f"http://127.0.0.1:{server.server_address[1]}/"  # type: ignore
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def serve_directory() -> Callable[..., ContextManager[Any]]:
+    """
+    Serve a local directory over HTTP on a random port while in a `with` block, yielding
+    the server. Its `uri` attribute is the base URL, `statuses` lists the status codes of
+    all responses so far and `ports` the client ports of all requests. The first
+    `failures` requests fail with 503.
+    """
+    return _serve
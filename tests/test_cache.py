@@ -0,0 +1,91 @@
+#
+#  test_cache.py
+#
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+import requests
+
+from owid.catalog.cache import HTTPCache, TableCache
+
+
+def test_http_cache_revalidates(tmp_path: Path, serve_directory: Any) -> None:
+    (tmp_path / "www").mkdir()
+    (tmp_path / "www" / "data.json").write_text('{"a": 1}')
+
+    with serve_directory(tmp_path / "www") as server:
+        cache = HTTPCache(tmp_path / "cache")
+
+        filename = cache.get(server.uri + "data.json")
+        assert filename.read_text() == '{"a": 1}'
+        assert filename.suffix == ".json"
+
+        # nothing changed, so later requests are answered with 304 over the same connection
+        assert cache.get(server.uri + "data.json") == filename
+        assert cache.get(server.uri + "data.json") == filename
+        assert server.statuses == [200, 304, 304]
+        assert len(set(server.ports)) == 1
+
+
+def test_http_cache_serves_stale_when_offline(tmp_path: Path, serve_directory: Any) -> None:
+    (tmp_path / "www").mkdir()
+    (tmp_path / "www" / "data.json").write_text('{"a": 1}')
+
+    with serve_directory(tmp_path / "www") as server:
+        cache = HTTPCache(tmp_path / "cache")
+        uri = server.uri + "data.json"
+        filename = cache.get(uri)
+
+    assert cache.get(uri) == filename
+
+
+def test_http_cache_cleans_up_failed_downloads(tmp_path: Path, serve_directory: Any, monkeypatch: Any) -> None:
+    (tmp_path / "www").mkdir()
+    (tmp_path / "www" / "data.json").write_text('{"a": 1}')
+
+    def iter_content(self: requests.Response, chunk_size: int = 1) -> Any:
+        yield b'{"a"'
+        raise requests.exceptions.ChunkedEncodingError("connection broken")
+
+    monkeypatch.setattr(requests.Response, "iter_content", iter_content)
+    with serve_directory(tmp_path / "www") as server:
+        cache = HTTPCache(tmp_path / "cache")
+        for _ in range(3):
+            with pytest.raises(requests.exceptions.ChunkedEncodingError):
+                cache.get(server.uri + "data.json")
+
+    assert list((tmp_path / "cache").iterdir()) == []
+
+
+def test_http_cache_evicts_least_recently_used(tmp_path: Path, serve_directory: Any) -> None:
+    (tmp_path / "www").mkdir()
+    for name in ["a", "b", "c"]:
+        (tmp_path / "www" / f"{name}.txt").write_text(name * 100)
+
+    with serve_directory(tmp_path / "www") as server:
+        cache = HTTPCache(tmp_path / "cache", max_bytes=250)
+
+        a = cache.get(server.uri + "a.txt")
+        b = cache.get(server.uri + "b.txt")
+        c = cache.get(server.uri + "c.txt")
+
+        assert not a.exists()
+        assert b.exists()
+        assert c.exists()
+
+
+def test_table_cache_cleans_up_failed_downloads(tmp_path: Path) -> None:
+    cache = TableCache(tmp_path)
+
+    def download(dirname: str) -> str:
+        (Path(dirname) / "data.meta.json").write_text("{}")
+        raise ConnectionError("offline")
+
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            cache.fetch("garden/a/latest/b/c", "abc", "feather", download)
+
+    assert list(tmp_path.iterdir()) == []
+    assert cache.misses == 3
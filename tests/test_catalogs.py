@@ -2,6 +2,8 @@
 #  test_catalogs.py
 #
 
+import asyncio
+import shutil
 import tempfile
 from contextlib import contextmanager
 from pathlib import Path
@@ -9,7 +11,10 @@ from typing import Iterable, Iterator, Optional
 
 import pytest  # noqa
 
-from owid.catalog import CHANNEL, LocalCatalog, RemoteCatalog, Table, find
+from owid.catalog import CHANNEL, LocalCatalog, RemoteCatalog, Table, catalogs, find
+from owid.catalog.cache import TableCache
+from owid.catalog.catalogs import LoadError
+from owid.catalog.cli import main
 
 from .test_datasets import create_temp_dataset
 
@@ -51,6 +56,56 @@ def test_remote_default_channel():
     assert set(c.frame.channel) == {"garden"}
 
 
+def test_remote_catalog_with_cache(tmp_path: Path, serve_directory):
+    with mock_catalog(2) as catalog:
+        with serve_directory(catalog.path) as server:
+            c1 = RemoteCatalog(server.uri, cache_dir=tmp_path)
+            c2 = RemoteCatalog(server.uri, cache_dir=tmp_path)
+
+            # the second catalog revalidates the index files instead of downloading them
+            assert server.statuses == [200, 200, 304, 304]
+            assert c1.frame.path.tolist() == c2.frame.path.tolist()
+
+
+def test_remote_catalog_fetches_search_index(tmp_path: Path, serve_directory):
+    with mock_catalog(2) as catalog:
+        with serve_directory(catalog.path) as server:
+            c = RemoteCatalog(server.uri, cache_dir=tmp_path)
+
+            # the first search scans the frame while the index is fetched in the background
+            expected = c.find(dataset="dataset1").path.tolist()
+            assert c._search_index is None
+
+            assert c._index_fetch is not None
+            c._index_fetch.result(timeout=10)
+            assert c.find(dataset="dataset1").path.tolist() == expected
+            assert c._search_index is not None
+
+
+def test_remote_catalog_with_table_cache(tmp_path: Path, serve_directory):
+    with mock_catalog(1) as catalog:
+        with serve_directory(catalog.path) as server:
+            table_cache = TableCache(tmp_path)
+            c = RemoteCatalog(server.uri, table_cache=table_cache)
+            n_requests = len(server.statuses)
+
+            t1 = c.find().iloc[0].load()
+            assert (table_cache.hits, table_cache.misses) == (0, 1)
+            assert len(server.statuses) == n_requests + 2
+
+            # the second load is served from disk
+            t2 = c.find().iloc[0].load()
+            assert (table_cache.hits, table_cache.misses) == (1, 1)
+            assert len(server.statuses) == n_requests + 2
+
+            assert t1.equals_table(t2)
+
+            # rows of the full frame have their checksum too
+            t3 = c.frame.iloc[0].load()
+            assert (table_cache.hits, table_cache.misses) == (2, 1)
+            assert t1.equals_table(t3)
+
+
 def test_find_from_local_catalog():
     with mock_catalog(3) as catalog:
         matches = catalog.find()
@@ -69,6 +124,89 @@ def test_load_from_local_catalog():
         catalog.find().iloc[0].load()
 
 
+def test_load_columns_from_local_catalog():
+    with mock_catalog(1) as catalog:
+        row = catalog.find().iloc[0]
+        t = row.load()
+        column = t.columns[-1]
+
+        t2 = catalog.find_one(table=f"^{row.table}$", columns=[column])
+        assert list(t2.columns) == [column]
+        assert t2.primary_key == t.primary_key
+
+
+def test_load_with_filters_from_local_catalog():
+    with mock_catalog(1) as catalog:
+        row = catalog.find().iloc[0]
+        assert "parquet" in row.formats
+
+        t = row.load()
+        key, value = t.primary_key[0], t.index.get_level_values(0)[0]
+
+        t2 = row.load(filters=[(key, "=", value)])
+        assert t2.equals_table(t[t.index.get_level_values(0) == value])
+
+
+def test_open_from_local_catalog():
+    with mock_catalog(1) as catalog:
+        row = catalog.find().iloc[0]
+
+        t = row.open()
+        assert not t.is_loaded
+        assert t.metadata.short_name == row.table
+
+        assert t.table.equals_table(row.load())
+
+
+def test_load_all_from_local_catalog():
+    with mock_catalog(3) as catalog:
+        matches = catalog.find()
+        tables = matches.load_all(max_workers=4)
+
+        assert list(tables) == matches.path.tolist()
+        assert all(isinstance(t, Table) for t in tables.values())
+
+
+def test_load_all_reports_failures():
+    with mock_catalog(2) as catalog:
+        matches = catalog.find()
+        broken = matches.path.iloc[0]
+        for format in ("feather", "parquet"):
+            (catalog.path / f"{broken}.{format}").unlink()
+
+        with pytest.raises(LoadError) as e:
+            matches.load_all()
+        assert list(e.value.errors) == [broken]
+        assert len(e.value.tables) == len(matches) - 1
+
+        tables = matches.load_all(errors="ignore")
+        assert len(tables) == len(matches) - 1
+
+
+def test_aload_from_local_catalog():
+    with mock_catalog(2) as catalog:
+        matches = catalog.find()
+
+        t = asyncio.run(matches.iloc[0].aload())
+        assert t.equals_table(matches.iloc[0].load())
+
+        tables = asyncio.run(matches.aload_all(max_concurrency=2))
+        assert list(tables) == matches.path.tolist()
+
+        # columns are passed through to every table
+        column = t.columns[0]
+        assert list(asyncio.run(matches.iloc[0].aload(columns=[column])).columns) == [column]
+        tables = asyncio.run(matches.aload_all(columns=[column]))
+        assert all(list(t.columns) == [column] for t in tables.values())
+
+
+def test_remote_catalog_acreate(serve_directory):
+    with mock_catalog(1) as catalog:
+        with serve_directory(catalog.path) as server:
+            c = asyncio.run(RemoteCatalog.acreate(server.uri))
+            assert c.frame.path.tolist() == catalog.frame.path.tolist()
+
+
 def test_local_default_channel():
     with mock_catalog(1, channels=("open_numbers",)) as catalog:
         catalog.find()
@@ -89,6 +227,91 @@ def test_calling_find_adds_channels():
     assert set(REMOTE_CATALOG.channels) == {"garden", "meadow"}  # type: ignore
 
 
+def test_find_matches_full_scan():
+    with mock_catalog(3, channels=("garden", "meadow")) as catalog:
+        frame = catalog.frame
+        table = frame.table.iloc[0]
+        for kwargs in [
+            {"table": table},
+            {"table": table[:2]},
+            {"table": f"^{table}$"},
+            {"dataset": "dataset1"},
+            {"dataset": "dataset1", "channel": "meadow"},
+            {"table": table[1:5], "namespace": frame.namespace.iloc[0]},
+        ]:
+            expected = frame[
+                (frame.table.str.contains(kwargs["table"]) if "table" in kwargs else True)
+                & (frame.namespace == kwargs["namespace"] if "namespace" in kwargs else True)
+                & (frame.dataset == kwargs["dataset"] if "dataset" in kwargs else True)
+                & (frame.channel == kwargs["channel"] if "channel" in kwargs else True)
+            ]
+            assert catalog.find(**kwargs).path.tolist() == expected.path.tolist()
+
+
+def test_search_index_is_persisted():
+    with mock_catalog(2, channels=("garden", "meadow")) as catalog:
+        assert (catalog.path / "catalog-garden.index.feather").exists()
+        assert (catalog.path / "catalog-meadow.index.feather").exists()
+
+        # a fresh catalog reads the saved index when it's first searched
+        reopened = LocalCatalog(catalog.path, channels=("garden", "meadow"))
+        assert reopened._search_index is None
+        assert sorted(reopened.find(dataset="dataset1").path) == sorted(catalog.find(dataset="dataset1").path)
+        assert reopened._search_index is not None
+
+
+def test_stale_search_index_is_not_used():
+    with mock_catalog(2) as catalog:
+        # rewrite the catalog with the same number of rows, but different ones
+        filename = catalog._catalog_channel_file("garden")
+        frame = catalogs.read_frame(filename)
+        frame["dataset"] = frame["dataset"].map({"dataset0": "dataset1", "dataset1": "dataset0"})
+        frame.to_feather(filename)
+
+        # it's scanned instead
+        reopened = LocalCatalog(catalog.path)
+        assert set(reopened.find(dataset="dataset0").path) == set(catalog.find(dataset="dataset1").path)
+        assert reopened._search_index is None
+
+
+def test_reindex_with_workers():
+    with mock_catalog(4, channels=("garden", "meadow")) as catalog:
+        expected = catalog.frame.copy()
+
+        catalog.reindex(workers=2)
+        assert catalog.frame.equals(expected)
+
+
+def test_iter_datasets_order():
+    with tempfile.TemporaryDirectory() as dirname:
+        root = Path(dirname) / "garden"
+        names = ["b/2021/x", "a/2022/y", "a/2021/z", "a/2021/y", "a-b/2021/x", "a/latest/x"]
+        for name in names:
+            (root / name).parent.mkdir(parents=True, exist_ok=True)
+            create_temp_dataset(root / name)
+
+        catalog = LocalCatalog(dirname)
+
+        expected = sorted(root / name for name in names)
+
+        assert [Path(ds.path) for ds in catalog.iter_datasets("garden")] == expected
+        assert [Path(ds.path) for ds in catalog.iter_datasets("garden", workers=3)] == expected
+        assert [Path(ds.path) for ds in catalog.iter_datasets("garden", include="2021")] == [
+            p for p in expected if "2021" in str(p)
+        ]
+
+
+def test_reindex_from_cli():
+    with mock_catalog(2) as catalog:
+        expected = catalog.frame.copy()
+        for f in catalog.path.glob("catalog-*"):
+            f.unlink()
+
+        main(["reindex", str(catalog.path), "--workers", "2"])
+
+        assert LocalCatalog(catalog.path).frame.path.tolist() == expected.path.tolist()
+
+
 def test_reindex_with_include():
     with mock_catalog(3, channels=("garden",)) as catalog:
         old_frame = catalog.frame.copy()
@@ -110,6 +333,46 @@ def test_reindex_with_include():
             new_frame[new_frame.dataset != "dataset0"].checksum
         )
 
+        # in the same order as a full reindex
+        catalog.reindex()
+        assert new_frame.path.tolist() == catalog.frame.path.tolist()
+
+
+def test_incremental_reindex(monkeypatch):
+    indexed = []
+    index_dataset = catalogs._index_dataset
+
+    def spy(path, catalog_path, previous=None):
+        indexed.append(Path(path).name)
+        return index_dataset(path, catalog_path, previous)
+
+    monkeypatch.setattr(catalogs, "_index_dataset", spy)
+
+    with mock_catalog(3, channels=("garden",)) as catalog:
+        assert (catalog.path / "catalog.manifest.json").exists()
+        old_frame = catalog.frame.copy()
+
+        # nothing changed
+        indexed.clear()
+        catalog.reindex(incremental=True)
+        assert indexed == []
+        assert sorted(catalog.frame.path) == sorted(old_frame.path)
+
+        # a changed dataset, a new one and a deleted one
+        create_temp_dataset(catalog.path / "garden" / "dataset0")
+        create_temp_dataset(catalog.path / "garden" / "dataset3")
+        shutil.rmtree(catalog.path / "garden" / "dataset1")
+
+        indexed.clear()
+        catalog.reindex(incremental=True)
+        assert sorted(indexed) == ["dataset0", "dataset3"]
+
+        # the result is the same as indexing from scratch, down to the order of rows
+        incremental_frame = catalog.frame.copy()
+        catalog.reindex()
+        assert incremental_frame.path.tolist() == catalog.frame.path.tolist()
+        assert incremental_frame.equals(catalog.frame)
+
 
 @contextmanager
 def mock_catalog(n: int = 3, channels: Iterable[CHANNEL] = ("garden",)) -> Iterator[LocalCatalog]:
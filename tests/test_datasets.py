@@ -16,7 +16,7 @@ from typing import Any, Iterator, Optional, Union
 import pytest
 import yaml
 
-from owid.catalog import Dataset, DatasetMeta
+from owid.catalog import Dataset, DatasetMeta, Table, datasets, tables
 
 from .mocking import mock
 from .test_tables import mock_table
@@ -155,6 +155,62 @@ def test_add_table_parquet():
         assert t2.equals_table(t)
 
 
+def test_add_table_converts_once(monkeypatch):
+    calls = []
+    repack_frame = tables.repack_frame
+
+    def spy(df):
+        calls.append(df)
+        return repack_frame(df)
+
+    monkeypatch.setattr(tables, "repack_frame", spy)
+    t = mock_table()
+
+    with temp_dataset_dir() as dirname:
+        ds = Dataset.create_empty(dirname)
+        ds.add(t, formats=["feather", "parquet", "csv"], workers=3)
+        assert len(calls) == 1
+
+        for format in ["feather", "parquet", "csv"]:
+            assert Table.read(join(dirname, f"{t.metadata.checked_name}.{format}")).equals_table(t)
+
+
+def test_add_arrow_table():
+    t = mock_table()
+
+    with temp_dataset_dir() as src, temp_dataset_dir() as dest:
+        ds = Dataset.create_empty(src)
+        ds.metadata = DatasetMeta(short_name="bob")
+        ds.add(t)
+
+        # copy the table to another dataset without converting to pandas
+        t2 = Table.read(join(src, t.metadata.checked_name + ".parquet"), backend="arrow")
+        ds2 = Dataset.create_empty(dest)
+        ds2.metadata = DatasetMeta(short_name="alice")
+        ds2.add(t2)
+
+        t3 = ds2[t.metadata.checked_name]
+        assert t3.equals_table(t)
+        assert t3.metadata.dataset == ds2.metadata
+
+
+def test_add_lazy_table():
+    t = mock_table()
+
+    with temp_dataset_dir() as src, temp_dataset_dir() as dest:
+        ds = Dataset.create_empty(src)
+        ds.metadata = DatasetMeta(short_name="bob")
+        ds.add(t)
+
+        ds2 = Dataset.create_empty(dest)
+        ds2.metadata = DatasetMeta(short_name="alice")
+        ds2.add(ds.open(t.metadata.checked_name))
+
+        t2 = ds2[t.metadata.checked_name]
+        assert t2.equals_table(t)
+        assert t2.metadata.dataset == ds2.metadata
+
+
 def test_metadata_roundtrip():
     with temp_dataset_dir() as dirname:
         d = Dataset.create_empty(dirname)
@@ -165,6 +221,35 @@ def test_metadata_roundtrip():
         assert d2.metadata == d.metadata
 
 
+@pytest.mark.parametrize("format", ["feather", "parquet", "csv"])
+def test_save_updates_tables_without_reading_data(monkeypatch, format):
+    with temp_dataset_dir() as dirname:
+        d = Dataset.create_empty(dirname)
+        d.metadata = mock(DatasetMeta)
+        for _ in range(3):
+            d.add(mock_table(), formats=[format])
+        d.metadata = mock(DatasetMeta)
+
+        # what we get from loading every table and saving its metadata
+        expected = {}
+        for name in d.table_names:
+            t = d[name]
+            t.metadata.dataset = d.metadata
+            t._save_metadata(join(dirname, "expected.json"))
+            with open(join(dirname, "expected.json")) as istream:
+                expected[name] = istream.read()
+
+        def fail(*args, **kwargs):
+            raise AssertionError("table data should not be read")
+
+        monkeypatch.setattr(Table, "read", fail)
+        d.save(workers=2)
+
+        for name in d.table_names:
+            with open(join(dirname, f"{name}.meta.json")) as istream:
+                assert istream.read() == expected[name]
+
+
 def test_dataset_size():
     with mock_dataset() as d:
         n_expected = len(glob(join(d.path, "*.feather")))
@@ -207,6 +292,70 @@ def test_dataset_hash_invariant_to_copying():
             assert d2.checksum() == d1.checksum()
 
 
+def test_dataset_hash_algorithms():
+    with mock_dataset() as d:
+        md5 = d.checksum()
+        assert d.checksum(algorithm="md5") == md5
+        assert len(md5) == 32
+
+        blake2b = d.checksum(algorithm="blake2b")
+        assert blake2b != md5
+        assert d.checksum(algorithm="blake2b", workers=4) == blake2b
+
+
+def test_dataset_hash_reads_unchanged_files_once(monkeypatch):
+    calls = []
+    checksum_file = datasets.checksum_file
+
+    def spy(filename, algorithm="md5"):
+        calls.append(filename)
+        return checksum_file(filename, algorithm)
+
+    monkeypatch.setattr(datasets, "checksum_file", spy)
+
+    with mock_dataset() as d:
+        c1 = d.checksum()
+        assert len(calls) == len(set(d._checksum_files))
+
+        calls.clear()
+        assert d.checksum() == c1
+        assert calls == []
+
+        # adding a table only hashes the new files and the rewritten index
+        d.add(mock_table())
+        calls.clear()
+        assert d.checksum() != c1
+        assert 0 < len(calls) < len(set(d._checksum_files))
+
+
+def test_dataset_hash_uses_given_cache(monkeypatch):
+    with mock_dataset() as d:
+        stats = d.file_stats()
+        for filename, checksum in d.file_checksums().items():
+            stats[Path(filename).name].update(checksum=checksum, algorithm="md5")
+
+        # in a fresh process, only the stats would be known
+        datasets._CHECKSUM_CACHE.clear()
+        checksum_file = datasets.checksum_file
+        monkeypatch.setattr(datasets, "checksum_file", None)
+        assert d.file_checksums(cache=stats) == {f: stats[Path(f).name]["checksum"] for f in d._checksum_files}
+
+        # checksums of another algorithm are not reused
+        monkeypatch.setattr(datasets, "checksum_file", checksum_file)
+        assert d.file_checksums("blake2b", cache=stats) == {
+            f: checksum_file(f, "blake2b").hexdigest() for f in d._checksum_files
+        }
+
+
+def test_dataset_hash_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(datasets, "CHECKSUM_CACHE_SIZE", 2)
+    datasets._CHECKSUM_CACHE.clear()
+
+    with mock_dataset() as d:
+        d.checksum()
+        assert len(datasets._CHECKSUM_CACHE) == 2
+
+
 def test_snake_case_dataset():
     with mock_dataset() as d:
         # short_name of a dataset must be snake_case
@@ -254,6 +403,37 @@ def test_update_metadata(tmp_path):
         assert d[table_name]["gdp"].metadata.title == "Variable title from YAML"
 
 
+def test_update_metadata_without_reading_data(tmp_path, monkeypatch):
+    with mock_dataset() as d:
+        table_names = d.table_names
+        temp_file = tmp_path / "my.meta.yml"
+        meta = {
+            "dataset": {"sources": [{"name": "New source"}]},
+            "tables": {
+                name: {"title": f"{name} from YAML", "variables": {"gdp": {"sources": [{"name": "GDP source"}]}}}
+                for name in table_names
+            },
+        }
+        temp_file.write_text(yaml.dump(meta))
+
+        # what we get from updating loaded tables
+        expected = []
+        for name in table_names:
+            t = d[name]
+            t.update_metadata_from_yaml(temp_file, name)
+            expected.append(t)
+
+        n_sources = len(d.metadata.sources)
+        with monkeypatch.context() as m:
+            m.setattr(Table, "read", lambda *args, **kwargs: pytest.fail("table data should not be read"))
+            d.update_metadata(temp_file, if_source_exists="append")
+
+        assert len(d.metadata.sources) == n_sources + 1
+        for name, t in zip(table_names, expected):
+            assert d[name].equals_table(t)
+            assert d[name].metadata.title == f"{name} from YAML"
+
+
 def test_bool():
     with mock_dataset(n_tables=0) as d:
         assert bool(d)
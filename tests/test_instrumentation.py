@@ -0,0 +1,83 @@
+#
+#  test_instrumentation.py
+#
+
+import tempfile
+from os.path import join
+from typing import Iterator, List
+
+import pytest
+
+from owid.catalog import instrumentation
+from owid.catalog.instrumentation import Span, span
+
+from .test_tables import mock_table
+
+
+@pytest.fixture
+def spans() -> Iterator[List[Span]]:
+    recorded: List[Span] = []
+    instrumentation.enable(log_spans=False)
+    instrumentation.add_hook(recorded.append)
+    try:
+        yield recorded
+    finally:
+        instrumentation.remove_hook(recorded.append)
+        instrumentation.disable()
+
+
+def test_disabled_spans_are_not_recorded() -> None:
+    recorded: List[Span] = []
+    instrumentation.add_hook(recorded.append)
+    try:
+        with span("table.read") as s:
+            assert s is None
+    finally:
+        instrumentation.remove_hook(recorded.append)
+
+    assert recorded == []
+
+
+@pytest.mark.parametrize("format", ["csv", "feather", "parquet"])
+def test_table_read_and_write_spans(spans: List[Span], format: str) -> None:
+    t = mock_table()
+    with tempfile.TemporaryDirectory() as dirname:
+        path = join(dirname, f"table.{format}")
+        t.to(path)
+        t.read(path)
+
+    write = [s for s in spans if s.operation == "table.write"]
+    read = [s for s in spans if s.operation == "table.read"]
+    assert len(write) == len(read) == 1
+
+    for s in write + read:
+        assert s.path == path
+        assert s.format == format
+        assert s.rows == len(t)
+        assert s.columns == len(t.columns)
+        assert s.bytes and s.bytes > 0
+        assert s.duration is not None and s.duration >= 0
+
+    assert "metadata.read" in [s.operation for s in spans]
+
+
+def test_span_records_errors(spans: List[Span]) -> None:
+    with pytest.raises(FileNotFoundError):
+        with span("metadata.read", path="missing.meta.json"):
+            open("missing.meta.json")
+
+    assert spans[0].error == "FileNotFoundError"
+
+
+def test_failing_hook_does_not_break_operations(spans: List[Span]) -> None:
+    def broken_hook(span: Span) -> None:
+        raise ValueError("broken")
+
+    instrumentation.add_hook(broken_hook)
+    try:
+        with span("table.read") as s:
+            assert s is not None
+    finally:
+        instrumentation.remove_hook(broken_hook)
+
+    assert [s.operation for s in spans] == ["table.read"]
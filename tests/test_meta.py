@@ -2,6 +2,7 @@
 #  test_meta.py
 #
 
+import json
 from dataclasses import dataclass
 from typing import Any, Dict, Optional
 
@@ -11,6 +12,8 @@ from dataclasses_json import dataclass_json
 
 from owid.catalog import meta
 
+from .mocking import mock
+
 
 def test_dict_mixin():
     @meta.pruned_json
@@ -77,3 +80,53 @@ def test_load_license_from_dict():
     }
     license = meta.License.from_dict(d)
     assert license.url == d["url"]
+
+
+@pytest.mark.parametrize("cls", [meta.Source, meta.License, meta.VariableMeta, meta.DatasetMeta, meta.TableMeta])
+def test_compiled_codecs_match_dataclasses_json(cls):
+    for _ in range(20):
+        m = mock(cls)
+        if cls is meta.TableMeta:
+            m.dataset = mock(meta.DatasetMeta)
+
+        expected = {k: v for k, v in m._dataclasses_json_to_dict().items() if v not in [None, [], {}]}
+        d = m.to_dict()
+        assert json.dumps(d, default=str) == json.dumps(expected, default=str)
+
+        assert _decode_both(cls, d)
+
+    assert cls().to_dict() == {k: v for k, v in cls()._dataclasses_json_to_dict().items() if v not in [None, [], {}]}  # type: ignore
+
+
+def test_compiled_codecs_cast_like_dataclasses_json():
+    d = {
+        "title": 12,
+        "sources": [{"name": 1, "publication_year": "2020"}],
+        "display": {1: {"nested": [1, 2]}, "a": None},
+        "unknown_field": "ignored",
+    }
+    assert _decode_both(meta.VariableMeta, d)
+
+    # non-optional fields keep None, with a warning
+    with pytest.warns(RuntimeWarning):
+        assert _decode_both(meta.DatasetMeta, {"is_public": None, "sources": [], "version": 1})
+    assert _decode_both(meta.DatasetMeta, {"is_public": 0, "sources": [meta.Source(name="s")]})
+    assert _decode_both(meta.TableMeta, {"primary_key": ("a", 1), "dataset": {"short_name": "ds"}})
+
+    # other values are encoded like dataclasses_json does too
+    v = meta.VariableMeta(title=("a", "b"), sources=(meta.Source(name="s"),), display={"x": (1, meta.License())})  # type: ignore
+    expected = {k: v for k, v in v._dataclasses_json_to_dict().items() if v not in [None, [], {}]}  # type: ignore
+    assert v.to_dict() == expected
+
+    # nested dataclasses are not pruned
+    t = meta.TableMeta(dataset=meta.DatasetMeta(short_name="ds", sources=[meta.Source(name="s")]))
+    assert t.to_dict()["dataset"] == t._dataclasses_json_to_dict()["dataset"]  # type: ignore
+    assert t.to_dict()["dataset"]["sources"][0]["url"] is None
+
+
+def _decode_both(cls, d):
+    m1 = cls.from_dict(d)
+    m2 = cls._dataclasses_json_from_dict(d)
+    return m1 == m2 and json.dumps(m1._dataclasses_json_to_dict(), default=str) == json.dumps(
+        m2._dataclasses_json_to_dict(), default=str
+    )
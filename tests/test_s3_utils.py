@@ -0,0 +1,110 @@
+#
+#  test_s3_utils.py
+#
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterator
+
+import pytest
+from moto import mock_aws
+
+from owid.catalog import s3_utils
+from owid.catalog.catalogs import _download_private_file, _read_private_table
+from owid.catalog.tables import Table
+
+from .test_tables import mock_table
+
+
+@pytest.fixture
+def s3(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Any]:
+    "A local S3 stand-in for Walden's space, with credentials in a temporary home directory."
+    (tmp_path / ".aws").mkdir()
+    (tmp_path / ".aws" / "config").write_text(
+        "[default]\naws_access_key_id = testing\naws_secret_access_key = testing\nregion = us-east-1\n"
+    )
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("MOTO_S3_CUSTOM_ENDPOINTS", s3_utils.SPACES_ENDPOINT)
+    monkeypatch.setattr(s3_utils, "AWS_PROFILE", "default")
+
+    s3_utils.clear_clients()
+    with mock_aws():
+        client = s3_utils.connect()
+        client.create_bucket(Bucket="walden")
+        yield client
+    s3_utils.clear_clients()
+
+
+def test_connect_reuses_clients(s3: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    checks = []
+    monkeypatch.setattr(s3_utils, "check_for_default_profile", checks.append)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = list(executor.map(lambda _: s3_utils.connect(), range(32)))
+
+    assert all(c is s3 for c in clients)
+    # the config file was only read when the client was created
+    assert checks == []
+
+
+def test_connect_per_endpoint_and_pool_size(s3: Any) -> None:
+    client = s3_utils.connect(max_pool_connections=4)
+    assert client is not s3
+    assert client.meta.config.max_pool_connections == 4
+    assert s3.meta.config.max_pool_connections == s3_utils.MAX_POOL_CONNECTIONS
+
+    assert s3_utils.connect(endpoint_url="https://ams3.digitaloceanspaces.com") is not s3
+
+
+def test_upload_and_download(s3: Any, tmp_path: Path) -> None:
+    (tmp_path / "data.txt").write_text("hello")
+    url = s3_utils.upload(str(tmp_path / "data.txt"), "test/data.txt")
+    assert url == f"{s3_utils.HTTPS_BASE}/test/data.txt"
+
+    def download(i: int) -> str:
+        filename = tmp_path / f"downloaded_{i}.txt"
+        s3_utils.download(url, str(filename), quiet=True)
+        return filename.read_text()
+
+    # the shared client is used from many threads at once
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert list(executor.map(download, range(16))) == ["hello"] * 16
+
+
+def test_connect_requires_profile(s3: Any) -> None:
+    with pytest.raises(s3_utils.MissingCredentialsError):
+        s3_utils.connect(profile="missing")
+
+
+def test_download_in_parts(s3: Any, tmp_path: Path) -> None:
+    data = os.urandom(2**20 + 123)
+    s3.put_object(Bucket="walden", Key="test/data.bin", Body=data)
+    url = f"{s3_utils.HTTPS_BASE}/test/data.bin"
+
+    # small parts, so that the file is fetched in several byte ranges
+    s3_utils.download(url, str(tmp_path / "data.bin"), quiet=True, part_size=256 * 2**10, max_concurrency=4)
+    assert (tmp_path / "data.bin").read_bytes() == data
+
+    # in memory, the downloaded buffer is returned without copying it
+    downloaded = s3_utils.download_bytes(url, part_size=256 * 2**10, max_concurrency=4)
+    assert isinstance(downloaded, memoryview)
+    assert downloaded == data
+
+
+@pytest.mark.parametrize("format", ["feather", "parquet"])
+def test_private_tables(s3: Any, tmp_path: Path, format: str) -> None:
+    s3.create_bucket(Bucket="owid-catalog")
+    t = mock_table()
+    t.to(str(tmp_path / f"table.{format}"))
+    for ext in (f".{format}", ".meta.json"):
+        s3.upload_file(str(tmp_path / f"table{ext}"), "owid-catalog", f"garden/test/table{ext}")
+
+    uri = f"https://catalog.ourworldindata.org/garden/test/table.{format}"
+    (tmp_path / "download").mkdir()
+    path = _download_private_file(uri, str(tmp_path / "download"), part_size=2**10)
+    expected = Table.read(path)
+    assert expected.equals_table(Table.read(str(tmp_path / f"table.{format}")))
+
+    # read straight from memory
+    assert _read_private_table(uri, part_size=2**10).equals_table(expected)
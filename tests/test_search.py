@@ -0,0 +1,63 @@
+#
+#  test_search.py
+#
+
+import numpy as np
+import pandas as pd
+
+from owid.catalog.search import SearchIndex
+
+
+def mock_frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "table": ["population", "population_density", "gdp", "co2", "gdp_per_capita"],
+            "namespace": ["owid", "owid", "wb", "gcp", "wb"],
+            "version": ["latest", "latest", "2022", "2022", "2022"],
+            "dataset": ["key_indicators", "key_indicators", "wdi", "co2", "wdi"],
+            "channel": ["garden", "garden", "garden", "meadow", "garden"],
+        }
+    )
+
+
+def test_lookup():
+    index = SearchIndex.from_frame(mock_frame())
+    assert index.lookup("namespace", "wb").tolist() == [2, 4]
+    assert index.lookup("channel", "meadow").tolist() == [3]
+    assert index.lookup("dataset", "missing").tolist() == []
+
+
+def test_candidates_contain_all_matches():
+    df = mock_frame()
+    index = SearchIndex.from_frame(df)
+    for pattern in ["pop", "density", "gdp_per", "o2", "xyz"]:
+        candidates = index.candidates(pattern)
+        expected = np.flatnonzero(df.table.str.contains(pattern))
+        if candidates is None:
+            # too short to use trigrams
+            assert len(pattern) < 3
+        else:
+            assert set(expected) <= set(candidates)
+
+
+def test_candidates_skip_regexes():
+    index = SearchIndex.from_frame(mock_frame())
+    assert index.candidates("^gdp") is None
+
+
+def test_save_and_load(tmp_path):
+    index = SearchIndex.from_frame(mock_frame(), source="d41d8cd98f00b204e9800998ecf8427e")
+    index.save(tmp_path / "index.feather")
+
+    loaded = SearchIndex.load(tmp_path / "index.feather")
+    assert loaded.n_rows == index.n_rows
+    assert loaded.source == index.source
+    assert loaded.lookup("version", "2022").tolist() == [2, 3, 4]
+    assert loaded.candidates("density").tolist() == index.candidates("density").tolist()  # type: ignore
+
+
+def test_concat_offsets_positions():
+    df = mock_frame()
+    index = SearchIndex.concat([SearchIndex.from_frame(df.iloc[:2]), SearchIndex.from_frame(df.iloc[2:])])
+    assert index.n_rows == len(df)
+    assert index.lookup("namespace", "wb").tolist() == [2, 4]
@@ -0,0 +1,52 @@
+#
+#  test_sessions.py
+#
+
+from pathlib import Path
+from typing import Any
+
+from owid.catalog import Table, sessions
+
+from .test_tables import mock_table
+
+
+def test_remote_tables_reuse_connections(tmp_path: Path, serve_directory: Any) -> None:
+    t = mock_table()
+    t.to_feather(str(tmp_path / "table.feather"))
+    t.to_parquet(str(tmp_path / "table.parquet"))
+
+    sessions.configure()
+    with serve_directory(tmp_path) as server:
+        for _ in range(3):
+            Table.read_feather(server.uri + "table.feather")
+            Table.read_parquet(server.uri + "table.parquet")
+
+    # metadata and data of all tables were fetched over a single connection
+    assert len(server.ports) == 12
+    assert len(set(server.ports)) == 1
+
+
+def test_configure_session() -> None:
+    try:
+        session = sessions.configure(pool_size=4, timeout=(1, 2), retries=5, backoff_factor=0)
+        assert sessions.get_session() is session
+
+        adapter = session.get_adapter("https://catalog.ourworldindata.org/")
+        assert isinstance(adapter, sessions.TimeoutHTTPAdapter)
+        assert adapter.timeout == (1, 2)
+        assert adapter.max_retries.total == 5
+        assert adapter._pool_maxsize == 4  # type: ignore
+    finally:
+        sessions.configure()
+
+
+def test_server_errors_are_retried(tmp_path: Path, serve_directory: Any) -> None:
+    (tmp_path / "data.json").write_text('{"a": 1}')
+
+    try:
+        sessions.configure(backoff_factor=0)
+        with serve_directory(tmp_path, failures=2) as server:
+            assert sessions.get_bytes(server.uri + "data.json") == b'{"a": 1}'
+        assert len(server.ports) == 3
+    finally:
+        sessions.configure()
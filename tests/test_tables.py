@@ -3,17 +3,22 @@
 #
 
 import json
+import os
+import pickle
 import tempfile
 from os.path import exists, join, splitext
+from typing import cast
 
 import jsonschema
 import numpy as np
 import pandas as pd
+import pyarrow
 import pytest
 
 from owid.catalog.datasets import FileFormat
-from owid.catalog.meta import TableMeta, VariableMeta
-from owid.catalog.tables import SCHEMA, Table
+from owid.catalog.fields import CopyOnWriteFields
+from owid.catalog.meta import Source, TableMeta, VariableMeta
+from owid.catalog.tables import SCHEMA, ArrowTable, Table
 from owid.catalog.variables import Variable
 
 from .mocking import mock
@@ -141,6 +146,217 @@ def test_round_trip_with_metadata(format: FileFormat) -> None:
         assert_tables_eq(t1, t2)
 
 
+@pytest.mark.parametrize("format", ["csv", "feather", "parquet"])
+def test_read_columns(format: FileFormat) -> None:
+    t1 = Table({"gdp": [100, 102, 104], "pop": [1, 2, 3], "area": [4, 5, 6], "country": ["AU", "SE", "NA"]})
+    t1.set_index("country", inplace=True)
+    for col in t1.all_columns:
+        t1._fields[col] = mock(VariableMeta)
+
+    with tempfile.TemporaryDirectory() as path:
+        filename = join(path, f"table.{format}")
+        t1.to(filename)
+
+        t2 = Table.read(filename, columns=["area", "gdp"])
+        assert t2.primary_key == ["country"]
+        assert list(t2.columns) == ["area", "gdp"]
+        assert t2.to_dict() == t1[["area", "gdp"]].to_dict()
+        assert t2._fields == {k: t1._fields[k] for k in ["country", "area", "gdp"]}
+
+
+def test_read_parquet_with_filters() -> None:
+    t1 = Table({"gdp": [100, 102, 104, 106], "year": [2000, 2001, 2000, 2001], "country": ["AU", "AU", "SE", "SE"]})
+    t1.set_index(["country", "year"], inplace=True)
+
+    with tempfile.TemporaryDirectory() as path:
+        filename = join(path, "table.parquet")
+        t1.to(filename)
+
+        t2 = Table.read(filename, filters=[("year", "=", 2001)])
+        assert t2.primary_key == ["country", "year"]
+        assert t2.to_dict() == t1.xs(2001, level="year", drop_level=False).to_dict()
+        assert t2._fields == t1._fields
+
+        # filters can be combined with columns, even on columns that aren't loaded
+        t3 = Table.read_parquet(filename, columns=["country", "year"], filters=[[("gdp", ">", 102)]])
+        assert list(t3.index) == [("SE", 2000), ("SE", 2001)]
+
+        t1.to(join(path, "table.feather"))
+        with pytest.raises(ValueError):
+            Table.read(join(path, "table.feather"), filters=[("year", "=", 2001)])
+
+
+def test_read_feather_memory_mapped() -> None:
+    t1 = Table({"gdp": [100.0, 102.0, 104.0], "country": ["AU", "SE", "NA"]})
+    t1.set_index("country", inplace=True)
+
+    with tempfile.TemporaryDirectory() as path:
+        filename = join(path, "table.feather")
+        t1.to_feather(filename, repack=False, compression="uncompressed")
+
+        t2 = Table.read(filename, memory_map=True)
+        assert_tables_eq(t1, t2)
+
+        # numeric columns point into the mapped file rather than a private copy
+        assert not t2.gdp.values.flags.writeable
+
+        with pytest.raises(ValueError):
+            Table.read_feather("https://example.com/table.feather", memory_map=True)
+
+
+def test_read_large_feather_memory_mapped() -> None:
+    # more rows than pyarrow puts in a single chunk by default
+    t1 = Table({"gdp": np.arange(200_000, dtype="float64"), "year": np.arange(200_000)})
+
+    with tempfile.TemporaryDirectory() as path:
+        filename = join(path, "table.feather")
+        t1.to_feather(filename, repack=False, compression="uncompressed")
+        assert pyarrow.ipc.open_file(filename).num_record_batches == 1
+
+        t2 = Table.read(filename, memory_map=True)
+        assert_tables_eq(t1, t2)
+
+        # columns are not concatenated from several chunks
+        assert not t2.gdp.values.flags.writeable
+        assert not t2.year.values.flags.writeable
+
+
+@pytest.mark.parametrize("format", ["csv", "feather", "parquet"])
+def test_open_loads_data_lazily(format: FileFormat) -> None:
+    t1 = mock_table()
+
+    with tempfile.TemporaryDirectory() as path:
+        filename = join(path, f"table.{format}")
+        t1.to(filename)
+
+        t2 = Table.open(filename)
+        assert not t2.is_loaded
+        assert t2.metadata == t1.metadata
+        assert t2._fields == t1._fields
+        assert t2.primary_key == t1.primary_key
+        assert list(t2.columns) == list(t1.columns)
+        assert not t2.is_loaded
+
+        assert list(t2.gdp) == list(t1.gdp)
+        assert t2.is_loaded
+        assert_tables_eq(t1, t2.table)
+
+
+def test_open_forwards_operators() -> None:
+    t1 = mock_table()
+
+    with tempfile.TemporaryDirectory() as path:
+        filename = join(path, "table.feather")
+        t1.to(filename)
+
+        t2 = Table.open(filename)
+        assert (t2 + 1).gdp.tolist() == (t1 + 1).gdp.tolist()
+        assert cast(pd.DataFrame, t2 == t1).to_numpy().all()
+        assert not (~cast(pd.DataFrame, t2 == t1)).to_numpy().any()
+        assert t1.join(Table.open(filename).rename(columns={"gdp": "gdp2"})).gdp2.tolist() == t1.gdp.tolist()
+
+
+def test_open_without_fields_uses_file_schema() -> None:
+    t1 = mock_table()
+
+    with tempfile.TemporaryDirectory() as path:
+        filename = join(path, "table.feather")
+        t1.to(filename)
+
+        metadata_filename = splitext(filename)[0] + ".meta.json"
+        with open(metadata_filename) as istream:
+            metadata = json.load(istream)
+        del metadata["fields"]
+        with open(metadata_filename, "w") as ostream:
+            json.dump(metadata, ostream)
+
+        t2 = Table.open(filename)
+        assert t2.all_columns == ["country", "gdp"]
+        assert not t2.is_loaded
+
+
+@pytest.mark.parametrize("format", ["feather", "parquet"])
+def test_iter_batches(format: FileFormat) -> None:
+    t1 = Table({"gdp": range(10), "pop": range(10, 20), "year": range(2000, 2010)})
+    t1.set_index("year", inplace=True)
+    for col in t1.all_columns:
+        t1._fields[col] = mock(VariableMeta)
+
+    with tempfile.TemporaryDirectory() as path:
+        filename = join(path, f"table.{format}")
+        t1.to(filename)
+
+        batches = list(Table.iter_batches(filename, batch_size=4))
+        assert [len(b) for b in batches] == [4, 4, 2]
+        assert all(b.metadata == t1.metadata for b in batches)
+        assert pd.concat(batches).to_dict() == t1.to_dict()
+        assert batches[0]._fields == t1._fields
+
+        batches = list(Table.iter_batches(filename, batch_size=4, columns=["pop"]))
+        assert list(batches[0].columns) == ["pop"]
+        assert batches[0].primary_key == ["year"]
+        assert pd.concat(batches).to_dict() == t1[["pop"]].to_dict()
+
+
+def _is_open(filename: str) -> bool:
+    "Whether this process has a file descriptor or memory map of the file."
+    for fd in os.listdir("/proc/self/fd"):
+        try:
+            if os.readlink(f"/proc/self/fd/{fd}") == filename:
+                return True
+        except OSError:
+            # the descriptor that listed the directory is gone by now
+            continue
+
+    with open("/proc/self/maps") as istream:
+        return filename in istream.read()
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="lists open files through /proc")
+@pytest.mark.parametrize("format", ["feather", "parquet"])
+def test_iter_batches_closes_file(format: FileFormat) -> None:
+    t1 = Table({"gdp": range(10), "pop": range(10, 20)})
+
+    with tempfile.TemporaryDirectory() as path:
+        filename = os.path.realpath(join(path, f"table.{format}"))
+        t1.to(filename)
+
+        batches = Table.iter_batches(filename, batch_size=4, columns=["pop"])
+        next(batches)
+        assert _is_open(filename)
+        batches.close()
+        assert not _is_open(filename)
+
+        Table.open(filename)
+        assert not _is_open(filename)
+
+
+@pytest.mark.parametrize("format", ["feather", "parquet"])
+def test_round_trip_arrow_backend(format: FileFormat) -> None:
+    t1 = mock_table()
+
+    with tempfile.TemporaryDirectory() as path:
+        filename = join(path, f"table.{format}")
+        t1.to(filename)
+
+        t2 = Table.read(filename, backend="arrow")
+        assert isinstance(t2, ArrowTable)
+        assert t2.primary_key == ["country"]
+        assert t2.columns == ["gdp"]
+        assert t2.metadata == t1.metadata
+        assert_tables_eq(t1, t2.to_table())
+
+        # writing it back gives the same table and metadata file
+        filename2 = join(path, f"table2.{format}")
+        t2.to(filename2)
+        assert_tables_eq(t1, Table.read(filename2))
+        with open(splitext(filename)[0] + ".meta.json") as f1, open(splitext(filename2)[0] + ".meta.json") as f2:
+            assert f1.read() == f2.read()
+
+        with pytest.raises(ValueError):
+            Table.read(join(path, "table.csv"), backend="arrow")
+
+
 def test_field_metadata_copied_between_tables():
     t1 = Table({"gdp": [100, 102, 104], "country": ["AU", "SE", "CH"]})
     t2 = Table({"hdi": [73, 92, 45], "country": ["AU", "SE", "CH"]})
@@ -293,6 +509,99 @@ def test_copy_metadata_from() -> None:
     assert t2.metadata.title == "GDP table"
 
 
+def _peek(t: Table, column: str) -> VariableMeta:
+    return cast(CopyOnWriteFields, t._fields).peek(column)
+
+
+def test_copies_share_metadata_until_modified() -> None:
+    t: Table = Table({"gdp": [100, 102, 104], "country": ["AU", "SE", "CH"]})
+    t.gdp.metadata.title = "GDP"
+    t.gdp.metadata.sources = [Source(name="World Bank")]
+    t = t.copy()
+
+    t2 = t.copy()
+    t3 = cast(Table, t.rename(columns={"gdp": "new_gdp"}))
+    assert _peek(t2, "gdp") is _peek(t, "gdp")
+    assert _peek(t3, "new_gdp") is _peek(t, "gdp")
+
+    t2.gdp.metadata.sources[0].name = "IMF"
+    t3.new_gdp.title = "New GDP"
+    t.gdp.metadata.sources.append(Source(name="OECD"))
+
+    assert t.gdp.title == "GDP"
+    assert [s.name for s in t.gdp.sources] == ["World Bank", "OECD"]
+    assert [s.name for s in t2.gdp.sources] == ["IMF"]
+    assert t3.new_gdp.title == "New GDP"
+    assert [s.name for s in t3.new_gdp.sources] == ["World Bank"]
+
+
+def test_copies_do_not_share_metadata_in_use() -> None:
+    t: Table = Table({"gdp": [100, 102, 104]})
+    meta = t.gdp.metadata
+
+    t2 = t.copy()
+    t3 = cast(Table, t.rename(columns={"gdp": "new_gdp"}))
+    t4: Table = Table({"gdp": [1, 2, 3]})
+    t4.copy_metadata_from(t)
+    meta.title = "changed"
+
+    assert t.gdp.title == "changed"
+    assert t2.gdp.title is None
+    assert t3.new_gdp.title is None
+    assert t4.gdp.title is None
+
+    # the same goes for metadata read from a file
+    with tempfile.TemporaryDirectory() as dirname:
+        t.to_feather(join(dirname, "t.feather"))
+        t = Table.read_feather(join(dirname, "t.feather"))
+
+    meta = t.gdp.metadata
+    t2 = t.copy()
+    meta.title = "changed again"
+    assert t2.gdp.title == "changed"
+
+
+def test_updated_fields_are_not_shared() -> None:
+    with tempfile.TemporaryDirectory() as dirname:
+        Table({"gdp": [100, 102, 104]}).to_feather(join(dirname, "t.feather"))
+        t = Table.read_feather(join(dirname, "t.feather"))
+
+    for update in [lambda f, m: f.update({"gdp": m}), lambda f, m: f.__ior__({"gdp": m})]:
+        meta = VariableMeta(title="GDP")
+        update(t._fields, meta)
+        t2 = t.copy()
+        meta.title = "leaked"
+        assert t2.gdp.title == "GDP"
+
+    # updating from other fields shares their metadata until it's modified
+    t3 = t.copy()
+    t3._fields.update(t._fields)
+    t3.gdp.title = "GDP copy"
+    assert t.gdp.title == "leaked"
+
+
+def test_join_shares_metadata_until_modified() -> None:
+    t1: Table = Table({"gdp": [100, 102], "country": ["AU", "SE"]}).set_index("country")
+    t2: Table = Table({"population": [1, 2], "country": ["AU", "SE"]}).set_index("country")
+    t2.population.metadata.sources = [Source(name="UN")]
+
+    t = t1.join(t2)
+    t.population.sources[0].name = "World Bank"
+
+    assert t2.population.sources[0].name == "UN"
+    assert t.population.sources[0].name == "World Bank"
+
+
+def test_copy_on_write_fields_survive_pickle() -> None:
+    t: Table = Table({"gdp": [100, 102, 104]})
+    t.gdp.metadata.title = "GDP"
+    t2 = pickle.loads(pickle.dumps(t.copy()))
+
+    t2.gdp.title = "GDP copy"
+    assert t.gdp.title == "GDP"
+    assert t2.gdp.title == "GDP copy"
+
+
 def test_addition_without_metadata() -> None:
     t: Table = Table({"a": [1, 2], "b": [3, 4]})
     t["c"] = t["a"] + t["b"]